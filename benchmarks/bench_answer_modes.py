@@ -0,0 +1,60 @@
+"""
+Fast path (retrieve + one model call) vs agent orchestration, against local fake Bedrock clients.
+Agent latency stands for the agent's multi-step orchestration before its first chunk; the fast path
+pays retrieve latency plus the model's time to first token.
+
+    python benchmarks/bench_answer_modes.py --questions 20 --agent-latency 3.0 --model-latency 0.6
+"""
+import argparse
+import time
+
+from common import emit, latency_summary
+from fakes import FakeAgentRuntime, FakeBedrockRuntime
+
+
+def _run(stream, questions):
+    first_chunk, totals = [], []
+    start = time.perf_counter()
+    for question in questions:
+        asked = time.perf_counter()
+        for i, _ in enumerate(stream(question)):
+            if i == 0:
+                first_chunk.append(time.perf_counter() - asked)
+        totals.append(time.perf_counter() - asked)
+    return first_chunk, totals, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--questions', type=int, default=20)
+    parser.add_argument('--agent-latency', type=float, default=3.0, help='fake agent time to first chunk (s)')
+    parser.add_argument('--model-latency', type=float, default=0.6, help='fake model time to first token (s)')
+    parser.add_argument('--retrieve-latency', type=float, default=0.15, help='fake knowledge base retrieval (s)')
+    parser.add_argument('--chunk-delay', type=float, default=0.005)
+    args = parser.parse_args()
+
+    from bedrock_integration import stream_fast_answer, stream_with_knowledge_base
+
+    reply = 'Bungalow supply in the region falls short of demand in every forecast year. ' * 4
+    agent = FakeAgentRuntime(latency=args.agent_latency, retrieve_latency=args.retrieve_latency,
+                             chunk_delay=args.chunk_delay, reply=reply, seed=0)
+    model = FakeBedrockRuntime(latency=args.model_latency, chunk_delay=args.chunk_delay, reply=reply, seed=0)
+    questions = [f'How many bungalows are planned in ward {i}?' for i in range(args.questions)]
+
+    modes = {
+        'agent': lambda q: stream_with_knowledge_base(q, client=agent, use_cache=False),
+        'fast': lambda q: stream_fast_answer(q, client=model, agent_client=agent, use_cache=False),
+    }
+    for mode, stream in modes.items():
+        first_chunk, totals, elapsed = _run(stream, questions)
+        emit({
+            'benchmark': 'answer_modes',
+            'mode': mode,
+            'questions': len(questions),
+            'first_chunk': latency_summary(first_chunk, elapsed),
+            'total': latency_summary(totals, elapsed),
+        })
+
+
+if __name__ == '__main__':
+    main()
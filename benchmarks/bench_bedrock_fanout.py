@@ -0,0 +1,48 @@
+"""
+Serial prompts against bedrock_batch.run_prompts on a local fake bedrock-runtime client
+that simulates latency and throttling.
+
+    python benchmarks/bench_bedrock_fanout.py --prompts 200 --latency 0.2 --capacity 16
+"""
+import argparse
+import functools
+import statistics
+
+from common import emit, timed
+from fakes import FakeBedrockRuntime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prompts', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--capacity', type=int, default=16, help='concurrent requests before the fake throttles')
+    parser.add_argument('--throttle-rate', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    from bedrock_batch import run_prompts
+    from bedrock_integration import generate_text
+
+    prompts = [f'Write a short commentary for region {i}' for i in range(args.prompts)]
+    for concurrency in args.concurrency:
+        client = FakeBedrockRuntime(latency=args.latency, capacity=args.capacity, throttle_rate=args.throttle_rate, seed=0)
+        call = functools.partial(generate_text, client=client, use_cache=False)
+        results, elapsed = timed(run_prompts, prompts, call, max_concurrency=concurrency, base_delay=0.05)
+        latencies = sorted(r.latency for r in results)
+        emit({
+            'benchmark': 'bedrock_fanout',
+            'concurrency': concurrency,
+            'prompts': len(prompts),
+            'seconds': round(elapsed, 3),
+            'prompts_per_second': round(len(prompts) / elapsed, 1),
+            'p50_latency': round(statistics.median(latencies), 3),
+            'max_latency': round(latencies[-1], 3),
+            'errors': sum(r.error is not None for r in results),
+            'throttled_calls': client.throttled,
+            'in_order': [r.prompt for r in results] == prompts,
+        })
+
+
+if __name__ == '__main__':
+    main()
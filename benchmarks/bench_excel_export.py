@@ -0,0 +1,63 @@
+"""
+Memory and time of create_excel (in-memory worksheet) against stream_excel (write-only worksheet)
+as the number of forecast rows grows. Each case runs in a fresh process so peak RSS is per case.
+
+    python benchmarks/bench_excel_export.py --rows 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import emit, peak_rss_mb, synthetic_forecast, timed
+
+
+def run_case(mode, rows):
+    from excel_helper import create_excel, stream_excel
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "forecast.xlsx")
+        baseline_mb = peak_rss_mb()
+        if mode == "stream":
+            _, elapsed = timed(stream_excel, synthetic_forecast(rows), filename)
+        else:
+            _, elapsed = timed(create_excel, list(synthetic_forecast(rows)), filename)
+        size = os.path.getsize(filename)
+
+    return {
+        "benchmark": "excel_export",
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(elapsed, 4),
+        "rows_per_second": round(rows / elapsed, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_delta_mb": round(peak_rss_mb() - baseline_mb, 1),
+        "file_bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 50_000])
+    parser.add_argument("--modes", nargs="+", choices=["workbook", "stream"], default=["workbook", "stream"])
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        emit(run_case(args.modes[0], args.rows[0]))
+        return
+
+    for rows in args.rows:
+        for mode in args.modes:
+            # Silence the "file created" print from the worker process
+            result = subprocess.run(
+                [sys.executable, __file__, "--single", "--modes", mode, "--rows", str(rows)],
+                capture_output=True, text=True, check=True
+            )
+            emit(json.loads(result.stdout.strip().splitlines()[-1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Serialisation time and payload size of a feature matrix sent to SageMaker as JSON, CSV and .npy,
+and decode time of the endpoint's response in each format, using sagemaker.encode_payload and
+sagemaker.decode_response. Optionally round-trips each format through a local fake endpoint.
+
+    python benchmarks/bench_sagemaker_payloads.py --rows 1000 100000 --features 50 --round-trip
+"""
+import argparse
+import io
+
+import numpy as np
+
+from common import emit, timed
+from fakes import FakeSageMakerServer
+
+
+class _Response:
+    """
+    Just enough of requests.Response for decode_response
+    """
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.headers = {'Content-Type': content_type}
+
+    def json(self):
+        import json
+        return json.loads(self.content)
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+
+def _response_body(predictions, content_type):
+    from sagemaker import CSV, NPY
+
+    if content_type == NPY:
+        buffer = io.BytesIO()
+        np.save(buffer, predictions)
+        return buffer.getvalue()
+    if content_type == CSV:
+        return '\n'.join(repr(float(p)) for p in predictions).encode('utf-8')
+    import json
+    return json.dumps({'predictions': predictions.tolist()}).encode('utf-8')
+
+
+def _best(fn, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        result, seconds = timed(fn, *args)
+        times.append(seconds)
+    return result, min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--features', type=int, default=50)
+    parser.add_argument('--round-trip', action='store_true', help='also time a request to a local fake endpoint')
+    args = parser.parse_args()
+
+    from sagemaker import CSV, JSON, NPY, SageMakerClient, decode_response, encode_payload
+
+    rng = np.random.default_rng(0)
+    for rows in args.rows:
+        matrix = rng.random((rows, args.features))
+        predictions = matrix.sum(axis=1)
+        json_size = None
+        for content_type in (JSON, CSV, NPY):
+            body, encode_seconds = _best(encode_payload, matrix, content_type)
+            size = len(body.encode('utf-8') if isinstance(body, str) else body)
+            json_size = json_size or size
+            response = _Response(_response_body(predictions, content_type), content_type)
+            _, decode_seconds = _best(decode_response, response)
+            record = {
+                'benchmark': 'sagemaker_payloads',
+                'format': content_type,
+                'rows': rows,
+                'features': args.features,
+                'encode_seconds': round(encode_seconds, 5),
+                'request_bytes': size,
+                'size_vs_json': round(size / json_size, 3),
+                'response_bytes': len(response.content),
+                'decode_seconds': round(decode_seconds, 5),
+            }
+            if args.round_trip:
+                with FakeSageMakerServer(formats=(JSON, CSV, NPY)) as server, SageMakerClient() as client:
+                    _, record['round_trip_seconds'] = _best(
+                        client.invoke, server.url, matrix, content_type, None, None, content_type
+                    )
+                record['round_trip_seconds'] = round(record['round_trip_seconds'], 5)
+            emit(record)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Latency of repeated SageMaker invocations: a fresh requests.post per call (no connection reuse)
+against SageMakerClient's pooled keep-alive session, on a local stand-in endpoint.
+
+    python benchmarks/bench_sagemaker_session.py --calls 500
+"""
+import argparse
+import json
+import statistics
+import time
+
+import requests
+
+from common import emit
+from fakes import FakeSageMakerServer
+
+
+def measure(call, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.0, help='server-side latency per request (s)')
+    args = parser.parse_args()
+
+    from sagemaker import SageMakerClient
+
+    payload = {'instances': [[5.1, 3.5, 1.4, 0.2], [6.2, 2.9, 4.3, 1.3]]}
+
+    with FakeSageMakerServer(latency=args.latency) as server:
+        def fresh_post():
+            response = requests.post(server.url, data=json.dumps(payload), headers={'Content-Type': 'application/json'})
+            response.raise_for_status()
+            return response.json()
+
+        client = SageMakerClient()
+        cases = [('requests.post', fresh_post), ('SageMakerClient', lambda: client.invoke(server.url, payload))]
+        for name, call in cases:
+            call()  # warm up; the pooled session opens its connection here
+            connections_before = server.connections
+            latencies = sorted(measure(call, args.calls))
+            emit({
+                'benchmark': 'sagemaker_session',
+                'client': name,
+                'calls': args.calls,
+                'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+                'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+                'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+                'connections_opened': server.connections - connections_before,
+            })
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
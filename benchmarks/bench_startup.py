@@ -0,0 +1,62 @@
+"""
+Cold import time of the app modules, each in a fresh interpreter, and whether boto3 got loaded.
+The "eager boto3 clients" case reproduces what bedrock_integration used to do at import time.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from common import SRC, emit
+
+EAGER_CLIENTS = (
+    "import boto3; "
+    "boto3.client(service_name='bedrock-runtime', region_name='us-west-2'); "
+    "boto3.client('bedrock-agent-runtime', region_name='us-west-2')"
+)
+
+CASES = {
+    "excel_helper": "import excel_helper",
+    "bedrock_integration": "import bedrock_integration",
+    "eager boto3 clients": EAGER_CLIENTS,
+    "lazy client first use": "import bedrock_integration; bedrock_integration.bedrock()",
+}
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "boto3_loaded": "boto3" in sys.modules}}))
+"""
+
+
+def run_probe(code):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(src=str(SRC), code=code)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in CASES.items():
+        runs = [run_probe(code) for _ in range(args.repeat)]
+        emit({
+            "benchmark": "startup",
+            "case": name,
+            "median_seconds": round(statistics.median(r["seconds"] for r in runs), 4),
+            "boto3_loaded": runs[0]["boto3_loaded"],
+        })
+
+
+if __name__ == "__main__":
+    main()
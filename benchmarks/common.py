@@ -0,0 +1,92 @@
+"""
+Shared helpers for the benchmark scripts. Run scripts from the repository root, e.g.
+python benchmarks/bench_excel_export.py
+"""
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+# Fake responses must never reach the app's on-disk response cache
+os.environ["BEDROCK_CACHE_PATH"] = ":memory:"
+
+
+def synthetic_forecast(n_rows):
+    """
+    Yield n_rows forecast records by cycling the FORECAST_JSON years with increasing year numbers
+    """
+    from excel_helper import FORECAST_JSON
+
+    base = FORECAST_JSON["forecast"]
+    first_year = base[0]["year"]
+    for i in range(n_rows):
+        record = dict(base[i % len(base)])
+        record["year"] = first_year + i
+        yield record
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def emit(record):
+    """
+    Print one benchmark result as a JSON line
+    """
+    print(json.dumps(record), flush=True)
+
+
+def percentile(sorted_values, q):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(latencies, elapsed):
+    """
+    p50/p95/p99/mean latency (seconds) and throughput (operations per second) for a run
+    """
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "p50": round(percentile(values, 50), 6),
+        "p95": round(percentile(values, 95), 6),
+        "p99": round(percentile(values, 99), 6),
+        "mean": round(sum(values) / len(values), 6) if values else 0.0,
+        "throughput_per_s": round(len(values) / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+def peak_traced_mb(fn, *args, **kwargs):
+    """
+    Run fn once under tracemalloc and return its peak Python memory in MB.
+    Kept separate from timing runs because tracing slows allocation-heavy code several-fold.
+    """
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
@@ -0,0 +1,320 @@
+"""
+Local stand-ins for the AWS clients used by the app, with configurable latency and throttling.
+They mirror the response shapes of the boto3 clients closely enough for bedrock_integration.
+"""
+import contextlib
+import io
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from botocore.exceptions import ClientError
+
+
+# Shortest prefix, in tokens, that Claude 3.7 Sonnet writes to the prompt cache
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+
+def throttling_error(operation):
+    return ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Rate exceeded'}}, operation)
+
+
+def split_chunks(text, chunk_size):
+    return [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)] or ['']
+
+
+class FakeBedrockRuntime:
+    """
+    Stand-in for the bedrock-runtime client.
+
+    Each call sleeps for latency seconds (plus up to jitter). Calls beyond capacity concurrent
+    requests, and a random throttle_rate fraction of the rest, raise ThrottlingException.
+    System blocks marked with cache_control are reported as a cache write the first time they are
+    seen and as a cache read afterwards, like Bedrock prompt caching; as with Claude 3.7 Sonnet,
+    blocks under PROMPT_CACHE_MIN_TOKENS are not cached and count as ordinary input tokens.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.05, capacity=None, throttle_rate=0.0, reply='Fake answer.', seed=None,
+                 chunk_size=16, chunk_delay=0.0):
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.jitter = jitter
+        self.capacity = capacity
+        self.throttle_rate = throttle_rate
+        self.reply = reply
+        self.calls = 0
+        self.throttled = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._prompt_cache = set()
+
+    def _enter(self, operation):
+        with self._lock:
+            self.calls += 1
+            over_capacity = self.capacity is not None and self._in_flight >= self.capacity
+            if over_capacity or self._random.random() < self.throttle_rate:
+                self.throttled += 1
+                raise throttling_error(operation)
+            self._in_flight += 1
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def _exit(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _usage(self, body):
+        request = json.loads(body or '{}')
+        usage = {'input_tokens': 0, 'output_tokens': len(self.reply) // 4}
+        for message in request.get('messages', []):
+            usage['input_tokens'] += sum(len(block.get('text', '')) for block in message['content']) // 4
+        for block in request.get('system', []):
+            tokens = len(block['text']) // 4
+            if 'cache_control' not in block or tokens < PROMPT_CACHE_MIN_TOKENS:
+                usage['input_tokens'] += tokens
+                continue
+            with self._lock:
+                warm = block['text'] in self._prompt_cache
+                self._prompt_cache.add(block['text'])
+            usage['cache_read_input_tokens' if warm else 'cache_creation_input_tokens'] = tokens
+        return usage
+
+    def invoke_model(self, **kwargs):
+        delay = self._enter('InvokeModel')
+        try:
+            time.sleep(delay)
+        finally:
+            self._exit()
+        body = {
+            'content': [{'type': 'text', 'text': self.reply}],
+            'usage': self._usage(kwargs.get('body')),
+        }
+        return {'body': io.BytesIO(json.dumps(body).encode('utf-8'))}
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        """
+        Streams reply as content_block_delta events of chunk_size characters; latency is time to first
+        event and chunk_delay the gap between events
+        """
+        delay = self._enter('InvokeModelWithResponseStream')
+        usage = self._usage(kwargs.get('body'))
+
+        def events():
+            try:
+                time.sleep(delay)
+                start = {'type': 'message_start', 'message': {'usage': usage}}
+                yield {'chunk': {'bytes': json.dumps(start).encode('utf-8')}}
+                for text in split_chunks(self.reply, self.chunk_size):
+                    event = {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': text}}
+                    yield {'chunk': {'bytes': json.dumps(event).encode('utf-8')}}
+                    time.sleep(self.chunk_delay)
+                yield {'chunk': {'bytes': json.dumps({'type': 'message_stop'}).encode('utf-8')}}
+            finally:
+                self._exit()
+
+        return {'body': events()}
+
+
+class FakeAgentRuntime(FakeBedrockRuntime):
+    """
+    Stand-in for the bedrock-agent-runtime client. invoke_agent returns a completion event
+    stream that waits latency seconds before the first chunk and chunk_delay between chunks;
+    retrieve returns canned passages after retrieve_latency seconds.
+    Latency, capacity and throttling behave as for FakeBedrockRuntime.
+    """
+
+    def __init__(self, *args, retrieve_latency=0.05, passages=5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retrieve_latency = retrieve_latency
+        self.passages = passages
+        self._sessions = {}
+
+    def retrieve(self, **kwargs):
+        """
+        Knowledge base retrieval: waits retrieve_latency and returns numberOfResults canned passages
+        """
+        delay = self._enter('Retrieve')
+        try:
+            time.sleep(delay - self.latency + self.retrieve_latency)
+        finally:
+            self._exit()
+        n = kwargs.get('retrievalConfiguration', {}).get('vectorSearchConfiguration', {}).get('numberOfResults', self.passages)
+        query = kwargs['retrievalQuery']['text']
+        return {'retrievalResults': [
+            {'content': {'text': f'Passage {i} about {query}. ' * 20},
+             'location': {'type': 'S3', 's3Location': {'uri': f's3://fake-kb/doc-{i}.pdf'}},
+             'score': 1.0 - i / 10}
+            for i in range(n)
+        ]}
+
+    def invoke_agent(self, **kwargs):
+        # Like the real agent, one session handles one turn at a time; concurrent turns on it queue
+        with self._lock:
+            session_lock = self._sessions.setdefault(kwargs.get('sessionId'), threading.Lock())
+        session_lock.acquire()
+        try:
+            delay = self._enter('InvokeAgent')
+        except Exception:
+            session_lock.release()
+            raise
+
+        usage = self._usage(json.dumps({
+            'messages': [{'content': [{'type': 'text', 'text': kwargs.get('inputText', '')}]}],
+        }))
+
+        def completion():
+            try:
+                time.sleep(delay)
+                if kwargs.get('enableTrace'):
+                    metadata = {'usage': {'inputTokens': usage['input_tokens'], 'outputTokens': usage['output_tokens'],
+                                          'cacheReadInputTokens': usage.get('cache_read_input_tokens', 0),
+                                          'cacheWriteInputTokens': usage.get('cache_creation_input_tokens', 0)}}
+                    step = {'modelInvocationOutput': {'metadata': metadata}}
+                    yield {'trace': {'trace': {'orchestrationTrace': step}}}
+                for text in split_chunks(self.reply, self.chunk_size):
+                    yield {'chunk': {'bytes': text.encode('utf-8')}}
+                    time.sleep(self.chunk_delay)
+            finally:
+                self._exit()
+                session_lock.release()
+
+        return {'sessionId': kwargs.get('sessionId'), 'completion': completion()}
+
+
+class FakeStreamlit:
+    """
+    Minimal stand-in for the streamlit module that chat_history and chat_turn render into.
+    Elements are counted rather than drawn; write_stream drains its iterator like the real one.
+    """
+
+    def __init__(self):
+        self.elements = 0
+
+    @contextlib.contextmanager
+    def chat_message(self, role):
+        self.elements += 1
+        yield self
+
+    def write_stream(self, stream):
+        self.elements += 1
+        return ''.join(stream)
+
+    def _element(self, *args, **kwargs):
+        self.elements += 1
+        return self
+
+    def add_rows(self, *args, **kwargs):
+        self.elements += 1
+
+    write = markdown = dataframe = subheader = line_chart = download_button = error = _element
+
+    def button(self, *args, **kwargs):
+        self.elements += 1
+        return False
+
+    def rerun(self):
+        pass
+
+
+class FakeSageMakerServer:
+    """
+    Local HTTP stand-in for a SageMaker invocations endpoint, used as a context manager.
+
+    Accepts {"instances": [[...], ...]} and answers {"predictions": [sum(instance), ...]} after
+    latency seconds. A fail_rate fraction of requests get a 503 so client retries are exercised.
+    Speaks HTTP/1.1 so clients can keep connections alive.
+
+    Content types listed in formats are also accepted: an application/x-npy or text/csv matrix is
+    answered with its row sums in the Accept type. Other types get 415, other Accept types 406.
+    """
+
+    def __init__(self, latency=0.0, fail_rate=0.0, seed=None, formats=('application/json',)):
+        self.latency = latency
+        self.formats = formats
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/invocations'
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out in separate writes; without TCP_NODELAY a kept-alive
+            # connection stalls on Nagle + delayed ACK (~40 ms per request)
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                with fake._lock:
+                    fake.requests += 1
+                    fail = fake._random.random() < fake.fail_rate
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fail:
+                    self._reply(503, b'{"message": "busy"}', 'application/json')
+                    return
+                content_type = self.headers.get('Content-Type', 'application/json')
+                accept = self.headers.get('Accept', 'application/json')
+                if content_type not in fake.formats:
+                    self._reply(415, b'{"message": "unsupported content type"}', 'application/json')
+                    return
+                if accept not in fake.formats and accept != '*/*':
+                    self._reply(406, b'{"message": "not acceptable"}', 'application/json')
+                    return
+                if content_type == 'application/x-npy':
+                    predictions = np.load(io.BytesIO(body), allow_pickle=False).sum(axis=1)
+                elif content_type == 'text/csv':
+                    predictions = np.loadtxt(io.BytesIO(body), delimiter=',', ndmin=2).sum(axis=1)
+                else:
+                    parsed = json.loads(body)
+                    instances = parsed.get('instances', []) if isinstance(parsed, dict) else parsed
+                    predictions = [sum(row) for row in instances]
+                if accept == 'application/x-npy':
+                    buffer = io.BytesIO()
+                    np.save(buffer, np.asarray(predictions, dtype=np.float64))
+                    self._reply(200, buffer.getvalue(), accept)
+                elif accept == 'text/csv':
+                    self._reply(200, '\n'.join(repr(float(p)) for p in predictions).encode('utf-8'), accept)
+                else:
+                    payload = json.dumps({'predictions': np.asarray(predictions).tolist()}).encode('utf-8')
+                    self._reply(200, payload, 'application/json')
+
+            def _reply(self, status, payload, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,261 @@
+"""
+Benchmark and load-test suite. Every AWS dependency is replaced by a local stand-in from fakes.py,
+so the suite runs offline. Writes a JSON report with p50/p95/p99 latency (seconds), throughput
+and peak traced memory per scenario, and can fail when p95 regresses against a saved baseline.
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import functools
+import io
+import itertools
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import latency_summary, peak_traced_mb, synthetic_forecast, timed
+from fakes import FakeAgentRuntime, FakeBedrockRuntime, FakeSageMakerServer, FakeStreamlit
+
+
+def _repeat(fn, repeat):
+    """
+    Time repeat calls of fn after one untimed warm-up call
+    """
+    fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_excel(sizes, repeat):
+    import excel_helper
+
+    for rows in sizes:
+        forecast = list(synthetic_forecast(rows))
+
+        def build():
+            excel_helper._EXCEL_CACHE.clear()
+            excel_helper.create_excel_bytes(forecast)
+
+        latencies, elapsed = timed(_repeat, build, repeat)
+        peak_mb = peak_traced_mb(build)
+        yield "create_excel", {"rows": rows}, latencies, elapsed, peak_mb, 0, {}
+
+
+def _history(n_messages):
+    from chat_turn import run_turn
+
+    messages = []
+    ui = FakeStreamlit()
+    with contextlib.redirect_stdout(io.StringIO()):
+        while len(messages) < n_messages:
+            run_turn(f"question {len(messages)}", ui, messages, answer_stream=lambda prompt: iter(["answer " * 50]))
+    return messages[:n_messages]
+
+
+def bench_history(lengths, repeat):
+    from chat_history import render_history
+
+    for n_messages in lengths:
+        messages = _history(n_messages)
+        for paged in (True, False):
+            page_size = 20 if paged else max(1, n_messages)
+
+            def render():
+                render_history(messages, FakeStreamlit(), {}, page_size=page_size)
+
+            latencies, elapsed = timed(_repeat, render, repeat)
+            peak_mb = peak_traced_mb(render)
+            yield "render_history", {"messages": n_messages, "paged": paged}, latencies, elapsed, peak_mb, 0, {}
+
+
+def bench_chat_turns(users, turns, agent, session_modes=("per_user",)):
+    """
+    Concurrent users each running turns. session_mode "per_user" gives every user their own agent session
+    from an AgentSessionPool; "shared" puts them all on the module-global session_id
+    """
+    from agent_sessions import AgentSessionPool
+    from bedrock_integration import stream_with_knowledge_base
+    from chat_turn import run_turn
+
+    for n_users, session_mode in itertools.product(users, session_modes):
+        client = FakeAgentRuntime(**agent)
+        session_pool = AgentSessionPool()
+
+        def answer_stream_for(user):
+            if session_mode == "shared":
+                return functools.partial(stream_with_knowledge_base, client=client, use_cache=False)
+            return functools.partial(session_pool.stream, user, client=client, use_cache=False)
+
+        def user_session(user):
+            messages = []
+            ui = FakeStreamlit()
+            answer_stream = answer_stream_for(user)
+            latencies, errors = [], 0
+            for turn in range(turns):
+                start = time.perf_counter()
+                response = run_turn(f"user {user} question {turn}", ui, messages, answer_stream=answer_stream)
+                latencies.append(time.perf_counter() - start)
+                errors += response.error is not None
+            return latencies, errors
+
+        def load():
+            with ThreadPoolExecutor(max_workers=n_users) as pool:
+                return list(pool.map(user_session, range(n_users)))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            sessions, elapsed = timed(load)
+            peak_mb = peak_traced_mb(run_turn, "memory probe", FakeStreamlit(), [], answer_stream=answer_stream_for("probe"))
+        latencies = [latency for session, _ in sessions for latency in session]
+        errors = sum(e for _, e in sessions)
+        yield "chat_turn", {"users": n_users, "sessions": session_mode, **agent}, latencies, elapsed, peak_mb, errors, {}
+
+
+def bench_model_stream(repeat, model):
+    from bedrock_integration import stream_text
+
+    client = FakeBedrockRuntime(**model)
+    first_chunk = []
+    errors = []
+
+    def stream():
+        start = time.perf_counter()
+        try:
+            for i, _ in enumerate(stream_text("question", client=client, use_cache=False)):
+                if i == 0:
+                    first_chunk.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(e)
+
+    latencies, elapsed = timed(_repeat, stream, repeat)
+    peak_mb = peak_traced_mb(stream)
+    yield "model_stream_total", model, latencies, elapsed, peak_mb, len(errors), {}
+    yield "model_stream_first_chunk", model, first_chunk, elapsed, peak_mb, len(errors), {}
+
+
+def bench_sagemaker(requests, concurrency, latency):
+    from sagemaker import SageMakerClient
+    from sagemaker_batcher import MicroBatcher
+
+    with FakeSageMakerServer(latency=latency) as server:
+        client = SageMakerClient(pool_size=concurrency)
+        batcher = MicroBatcher(server.url, client=client)
+        modes = {
+            "direct": lambda i: client.invoke(server.url, {"instances": [[i, 1.0]]})["predictions"][0],
+            "micro_batched": lambda i: batcher.predict([i, 1.0]),
+        }
+        for mode, predict in modes.items():
+            def timed_predict(i):
+                start = time.perf_counter()
+                predict(i)
+                return time.perf_counter() - start
+
+            def load():
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    return list(pool.map(timed_predict, range(requests)))
+
+            served_before = server.requests
+            latencies, elapsed = timed(load)
+            peak_mb = peak_traced_mb(predict, 0)
+            params = {"mode": mode, "concurrency": concurrency, "latency": latency}
+            extra = {"endpoint_calls": server.requests - served_before}
+            yield "sagemaker_predict", params, latencies, elapsed, peak_mb, 0, extra
+        batcher.close()
+        client.close()
+
+
+def _key(result):
+    return json.dumps([result["scenario"], result["params"]], sort_keys=True)
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """
+    Return descriptions of scenarios whose p95 grew by more than tolerance (as a fraction)
+    and by more than min_delta seconds over the baseline
+    """
+    previous = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old and result["p95"] > old["p95"] * (1 + tolerance) and result["p95"] - old["p95"] > min_delta:
+            regressions.append(f"{result['scenario']} {result['params']}: p95 {old['p95']:.4f}s -> {result['p95']:.4f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="previous report to compare p95 latencies against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth over baseline (default 0.2)")
+    parser.add_argument("--min-delta", type=float, default=0.002,
+                        help="ignore p95 growth smaller than this many seconds (default 0.002)")
+    parser.add_argument("--agent-latency", type=float, default=0.5, help="fake agent time to first chunk (s)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="characters per streamed chunk")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="delay between streamed chunks (s)")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of fake Bedrock calls throttled")
+    parser.add_argument("--sagemaker-latency", type=float, default=0.01, help="fake endpoint latency (s)")
+    args = parser.parse_args()
+
+    reply = "The bungalow shortfall widens each year of the forecast. " * 8
+    stream_config = {"chunk_size": args.chunk_size, "chunk_delay": args.chunk_delay,
+                     "throttle_rate": args.throttle_rate, "reply": reply}
+    agent = {"latency": args.agent_latency, **stream_config}
+    model = {"latency": args.agent_latency / 2, **stream_config}
+
+    if args.quick:
+        scenarios = [
+            bench_excel([5, 500], repeat=3),
+            bench_history([30, 300], repeat=5),
+            bench_chat_turns([1, 4], turns=2, agent=agent, session_modes=("shared", "per_user")),
+            bench_model_stream(5, model),
+            bench_sagemaker(100, 8, args.sagemaker_latency),
+        ]
+    else:
+        scenarios = [
+            bench_excel([5, 500, 5_000, 20_000], repeat=5),
+            bench_history([30, 300, 3_000], repeat=20),
+            bench_chat_turns([1, 8, 32], turns=5, agent=agent, session_modes=("shared", "per_user")),
+            bench_model_stream(20, model),
+            bench_sagemaker(1_000, 32, args.sagemaker_latency),
+        ]
+
+    results = []
+    for scenario in scenarios:
+        for name, params, latencies, elapsed, peak_mb, errors, extra in scenario:
+            params = {k: v for k, v in params.items() if k != "reply"}
+            result = {"scenario": name, "params": params, **latency_summary(latencies, elapsed),
+                      "peak_traced_mb": round(peak_mb, 2), "errors": errors, **extra}
+            results.append(result)
+            print(f"{name} {params}: p50 {result['p50']:.4f}s p95 {result['p95']:.4f}s", file=sys.stderr)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "quick": args.quick},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
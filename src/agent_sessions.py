@@ -0,0 +1,115 @@
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from attrs import define, field
+
+from aws_clients import MAX_POOL_CONNECTIONS
+from bedrock_integration import stream_with_knowledge_base
+
+# Bedrock forgets an agent session after its idle TTL (30 minutes by default); match it locally
+DEFAULT_IDLE_TIMEOUT = 1800
+
+
+@define
+class AgentSession:
+    session_id: str
+    last_used: float
+    lock: threading.Lock = field(factory=threading.Lock)
+
+
+class AgentSessionPool:
+    """
+    Gives each user (e.g. a Streamlit session) its own Bedrock agent session.
+
+    A user's turns run one at a time on their own session, so their conversation memory is never
+    interleaved with anyone else's, while different users' invoke_agent calls run concurrently,
+    up to max_in_flight at once (by default the size of the shared AWS connection pool).
+    Sessions unused for idle_timeout seconds are dropped; the user gets a fresh one next turn.
+
+    Args:
+        prefix (str, optional): Agent session id prefix. Defaults to 'COTSWOLD'.
+        idle_timeout (float, optional): Seconds before an idle session is evicted. Defaults to 1800.
+        max_in_flight (int, optional): Most concurrent agent calls. Defaults to MAX_POOL_CONNECTIONS.
+    """
+
+    def __init__(self, prefix='COTSWOLD', idle_timeout=DEFAULT_IDLE_TIMEOUT, max_in_flight=MAX_POOL_CONNECTIONS,
+                 clock=time.monotonic):
+        self.prefix = prefix
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._next_sweep = clock() + idle_timeout / 10
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _session(self, user_key):
+        now = self.clock()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._evict(now)
+            session = self._sessions.get(user_key)
+            if session is None:
+                session = AgentSession(f'{self.prefix}-{secrets.token_hex(8)}', now)
+                self._sessions[user_key] = session
+            session.last_used = now
+            return session
+
+    def _evict(self, now):
+        for user_key, session in list(self._sessions.items()):
+            if now - session.last_used > self.idle_timeout and not session.lock.locked():
+                del self._sessions[user_key]
+        self._next_sweep = now + self.idle_timeout / 10
+
+    def evict_idle(self):
+        """
+        Drop sessions idle for longer than idle_timeout. Also runs periodically on use
+        """
+        with self._lock:
+            self._evict(self.clock())
+
+    def session_id(self, user_key):
+        return self._session(user_key).session_id
+
+    def end(self, user_key):
+        """
+        Forget a user's session, e.g. when they clear the chat
+        """
+        with self._lock:
+            self._sessions.pop(user_key, None)
+
+    @contextmanager
+    def acquire(self, user_key):
+        """
+        Hold the user's session (one turn at a time) and an in-flight slot; yields the agent session id
+        """
+        session = self._session(user_key)
+        with session.lock, self._in_flight:
+            yield session.session_id
+            session.last_used = self.clock()
+
+    def stream(self, user_key, query, answer_stream=stream_with_knowledge_base, **kwargs):
+        """
+        Stream an answer on the user's own agent session. Takes the same arguments as stream_with_knowledge_base
+        """
+        with self.acquire(user_key) as session_id:
+            yield from answer_stream(query, session_id=session_id, **kwargs)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """
+    Process-wide AgentSessionPool shared by every Streamlit session of the app
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = AgentSessionPool()
+        return _default_pool
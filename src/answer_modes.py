@@ -0,0 +1,63 @@
+import re
+
+import tracing
+from bedrock_integration import stream_fast_answer, stream_with_knowledge_base
+
+AUTO = 'Auto'
+FAST = 'Fast'
+AGENT = 'Agent'
+MODES = (AUTO, FAST, AGENT)
+
+# Questions that need planning, comparison or several steps go to the agent; plain lookups don't
+AGENT_PATTERN = re.compile(
+    r"\b(what if|scenario|compare|comparison|versus|vs\.?|recommend|should|strategy|strategic|plan|options?|"
+    r"impact|why|explain|trade-?offs?|pros and cons|prioriti[sz]e)\b",
+    re.IGNORECASE
+)
+
+# Questions that lean on earlier turns ("and in 2028?", "what about Durham?", "is it higher there?");
+# only the agent keeps the conversation, so these never take the stateless fast path
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(and|but|or|so|also|then|what about|how about|same)\b|"
+    r"\b(it|its|they|them|their|those|these|that one|same|above|previous|earlier|instead|else)\b",
+    re.IGNORECASE
+)
+
+FAST_MAX_WORDS = 25
+# Mid-conversation, anything this short is taken as a follow-up
+STANDALONE_MIN_WORDS = 5
+
+
+def choose_mode(question, first_turn=True):
+    """
+    Route a question to FAST (retrieve, then one model call) or AGENT (full orchestration).
+    Short factual lookups take the fast path; long, multi-part or advisory questions use the agent.
+    After the first turn, the fast path only takes questions that stand on their own
+    """
+    if AGENT_PATTERN.search(question):
+        return AGENT
+    if not first_turn and (FOLLOW_UP_PATTERN.search(question) or len(question.split()) < STANDALONE_MIN_WORDS):
+        return AGENT
+    if len(question.split()) > FAST_MAX_WORDS or question.count('?') > 1:
+        return AGENT
+    return FAST
+
+
+def routed_stream(question, mode=AUTO, agent_stream=stream_with_knowledge_base, fast_stream=stream_fast_answer,
+                  first_turn=True, **kwargs):
+    """
+    Stream an answer from the path chosen by mode (AUTO picks one with choose_mode; first_turn
+    says whether the question opens the conversation).
+    agent_stream and fast_stream are called with the question and kwargs (e.g. instructions),
+    e.g. a per-user AgentSessionPool.stream. Only the question is used for routing.
+    Each answer is timed, until its last chunk, on an answer.fast or answer.agent span
+    """
+    if mode == AUTO:
+        mode = choose_mode(question, first_turn)
+    stream = fast_stream(question, **kwargs) if mode == FAST else agent_stream(question, **kwargs)
+    return _timed_answer(stream, mode)
+
+
+def _timed_answer(stream, mode):
+    with tracing.span(f'answer.{mode.lower()}', mode=mode):
+        yield from stream
@@ -0,0 +1,33 @@
+import os
+import threading
+
+# Shared by every thread in the process; size it to the number of concurrent AWS calls
+MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', 50))
+
+RETRIES = {'max_attempts': 4, 'mode': 'standard'}
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(service_name, region_name=None):
+    """
+    Return the process-wide boto3 client for a service, creating it on first use.
+
+    boto3/botocore are only imported here, so modules that never call AWS don't pay for
+    loading them, and importing the app doesn't require credentials or a region.
+    Clients are thread-safe and share a connection pool of MAX_POOL_CONNECTIONS.
+    """
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        if key not in _clients:
+            import boto3
+            from botocore.config import Config
+
+            config = Config(max_pool_connections=MAX_POOL_CONNECTIONS, retries=RETRIES)
+            _clients[key] = boto3.client(service_name, region_name=region_name, config=config)
+        return _clients[key]
@@ -0,0 +1,168 @@
+"""
+Build one forecast workbook per region across a process pool.
+
+Input is either a directory of JSON files or a JSON-lines file; each document has the
+FORECAST_JSON shape ({"region": ..., "forecast": [...]}).
+
+    python src/batch_export.py forecasts/ --output-dir out/ --workers 8
+    python src/batch_export.py forecasts.jsonl --output-dir out/ --stream
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from excel_helper import create_excel, stream_excel
+
+DEFAULT_FILENAME_PATTERN = "{region}_housing_forecast.xlsx"
+
+
+def region_slug(region):
+    return re.sub(r"[^A-Za-z0-9]+", "_", region).strip("_") or "region"
+
+
+def output_filename(region, output_dir, filename_pattern=DEFAULT_FILENAME_PATTERN, taken=()):
+    """
+    Workbook path for a region. Names already in taken (e.g. "St. Albans" and "St Albans" share a slug)
+    get a numbered suffix: St_Albans_housing_forecast_2.xlsx
+    """
+    filename = os.path.join(output_dir, filename_pattern.format(region=region_slug(region)))
+    base, ext = os.path.splitext(filename)
+    suffix = 1
+    while filename in taken:
+        suffix += 1
+        filename = f"{base}_{suffix}{ext}"
+    return filename
+
+
+def iter_sources(path):
+    """
+    Yield (label, kind, payload) for each regional forecast without parsing it.
+    Parsing happens in the worker so a malformed document only fails its own region.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".json"):
+                yield name, "file", os.path.join(path, name)
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield f"line {line_number}", "line", line
+
+
+def export_region(kind, payload, output_dir, filename_pattern=DEFAULT_FILENAME_PATTERN, stream=False,
+                  temp_name=None):
+    """
+    Worker: load one regional forecast and write its workbook. Returns (region, filename, rows, seconds).
+    With temp_name the workbook is written to that name in output_dir instead, for the caller to rename
+    """
+    start = time.perf_counter()
+    if kind == "file":
+        with open(payload, encoding="utf-8") as f:
+            document = json.load(f)
+    else:
+        document = json.loads(payload)
+
+    region = document["region"]
+    forecast = document["forecast"]
+    filename = os.path.join(output_dir, temp_name) if temp_name else output_filename(region, output_dir, filename_pattern)
+
+    # Keep per-file "created" messages out of the batch progress output
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stream:
+            rows = stream_excel(forecast, filename)
+        else:
+            rows = len(create_excel(forecast, filename))
+    return region, filename, rows, time.perf_counter() - start
+
+
+def _remove_partial(filename):
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(filename)
+
+
+def run_batch(path, output_dir, workers=None, filename_pattern=DEFAULT_FILENAME_PATTERN, stream=False):
+    """
+    Export every region under path. Failures are collected rather than raised.
+    Returns (results, failures) where failures is a list of (label, error message).
+    Regions whose names map to the same file are numbered in source order rather than overwritten.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    exported = []
+    failures = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Workers write to per-source temporary names; final names are given out below, once every
+        # region is known, so colliding names can't overwrite each other
+        futures = {
+            pool.submit(export_region, kind, payload, output_dir, filename_pattern, stream,
+                        f".partial-{index}.xlsx"): (index, label)
+            for index, (label, kind, payload) in enumerate(iter_sources(path))
+        }
+        total = len(futures)
+        for done, future in enumerate(as_completed(futures), start=1):
+            index, label = futures[future]
+            try:
+                region, temp_filename, rows, seconds = future.result()
+            except Exception as e:
+                failures.append((label, f"{type(e).__name__}: {e}"))
+                print(f"[{done}/{total}] ❌ {label}: {type(e).__name__}: {e}")
+                _remove_partial(os.path.join(output_dir, f".partial-{index}.xlsx"))
+                continue
+            exported.append((index, label, region, temp_filename, rows, seconds))
+            print(f"[{done}/{total}] {region} ({rows} rows, {seconds:.2f}s)")
+
+    results = []
+    taken = set()
+    for _, label, region, temp_filename, rows, seconds in sorted(exported):
+        filename = output_filename(region, output_dir, filename_pattern, taken)
+        try:
+            os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+            os.replace(temp_filename, filename)
+        except OSError as e:
+            failures.append((label, f"{type(e).__name__}: {e}"))
+            print(f"❌ {region}: could not write {filename}: {type(e).__name__}: {e}")
+            _remove_partial(temp_filename)
+            continue
+        if filename != output_filename(region, output_dir, filename_pattern):
+            print(f"⚠️ {region}: file name already used by another region, writing {filename}")
+        taken.add(filename)
+        results.append((region, filename, rows, seconds))
+
+    elapsed = time.perf_counter() - start
+    rows = sum(r[2] for r in results)
+    print(
+        f"\nExported {len(results)} of {total} regions in {elapsed:.1f}s "
+        f"({len(results) / elapsed if elapsed else 0:.1f} regions/s, {rows / elapsed if elapsed else 0:.0f} rows/s); "
+        f"{len(failures)} failed."
+    )
+    for label, error in failures:
+        print(f"  {label}: {error}")
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="directory of regional JSON files, or a JSON-lines file")
+    parser.add_argument("--output-dir", default="forecast_workbooks")
+    parser.add_argument("--workers", type=int, default=None, help="process count (default: CPU count)")
+    parser.add_argument(
+        "--filename-pattern", default=DEFAULT_FILENAME_PATTERN,
+        help="output filename; {region} is replaced by the region name (default: %(default)s)"
+    )
+    parser.add_argument("--stream", action="store_true", help="use write-only streaming export for large forecasts")
+    args = parser.parse_args(argv)
+
+    _, failures = run_batch(args.source, args.output_dir, args.workers, args.filename_pattern, args.stream)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from attrs import define
+
+from bedrock_integration import generate_text
+
+THROTTLING_ERROR_CODES = {'ThrottlingException', 'TooManyRequestsException', 'ServiceUnavailableException'}
+
+
+@define
+class PromptResult:
+    prompt: str
+    text: str | None
+    error: str | None
+    latency: float
+    attempts: int
+
+
+def is_throttling_error(error):
+    """
+    True for botocore ClientErrors (or look-alikes) that Bedrock raises when we are sending too fast
+    """
+    # Other libraries' exceptions (e.g. requests') also have .response, but not a boto error dict
+    response = getattr(error, 'response', None)
+    code = response.get('Error', {}).get('Code') if isinstance(response, dict) else None
+    return code in THROTTLING_ERROR_CODES
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that backs off when the service throttles.
+
+    Starts at max_concurrency, halves on every throttle and grows by one after
+    max_concurrency consecutive successes (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, max_concurrency):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled=False):
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.max_concurrency and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+def run_prompts(prompts, call=generate_text, max_concurrency=8, max_attempts=6, base_delay=0.5, max_delay=20.0):
+    """
+    Run call(prompt) for every prompt on a thread pool with at most max_concurrency requests in flight.
+
+    Throttled requests are retried with full-jitter exponential backoff, and the concurrency
+    limit shrinks while the service is throttling. Results come back in input order as
+    PromptResult objects; latency covers every attempt including backoff sleeps.
+    """
+    prompts = list(prompts)
+    limiter = AdaptiveLimiter(max_concurrency)
+
+    def run_one(prompt):
+        start = time.perf_counter()
+        for attempt in range(1, max_attempts + 1):
+            limiter.acquire()
+            throttled = False
+            try:
+                text = call(prompt)
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                if not throttled or attempt == max_attempts:
+                    return PromptResult(prompt, None, f'{type(e).__name__}: {e}', time.perf_counter() - start, attempt)
+            else:
+                return PromptResult(prompt, text, None, time.perf_counter() - start, attempt)
+            finally:
+                # Always give the slot back, whatever happens while handling the error
+                limiter.release(throttled=throttled)
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1))))
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        return list(pool.map(run_one, prompts))
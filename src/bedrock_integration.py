@@ -1,13 +1,20 @@
-import boto3
 import json
+import os
+import time
 from random import randint
+import tracing
+from aws_clients import get_client
+from response_cache import ResponseCache
+from semantic_cache import HashingEmbedder, SemanticCache, TitanEmbedder
 
-bedrock = boto3.client(
-    service_name='bedrock-runtime',
-    region_name='us-west-2'
-)
 
-bedrock_agent = boto3.client('bedrock-agent-runtime')
+def bedrock():
+    return get_client('bedrock-runtime', region_name='us-west-2')
+
+
+def bedrock_agent():
+    return get_client('bedrock-agent-runtime')
+
 
 AGENT_ID = '8RSPIPN0XN'
 
@@ -19,6 +26,25 @@ MODEL_ARN = 'arn:aws:bedrock:us-west-2::foundation-model/anthropic.claude-3-7-so
 
 KB_ID = 'SFUSG2PIGD'
 
+AGENT_CACHE_SCOPE = f'agent:{AGENT_ID}:{AGENT_ALIAS}'
+
+MODEL_CACHE_SCOPE = 'model'
+
+# Retrieved passages and the answers grounded on them; cleared with the agent answers on re-sync
+KB_CACHE_SCOPE = f'kb:{KB_ID}'
+
+response_cache = ResponseCache()
+
+# Answers to reworded questions on the fast path. Off unless SEMANTIC_CACHE_EMBEDDER is 'titan' (Amazon Titan
+# embeddings) or 'hashing' (the local HashingEmbedder, which misses meaning Titan catches; for offline use)
+SEMANTIC_CACHE_EMBEDDERS = {'titan': TitanEmbedder, 'hashing': HashingEmbedder}
+_semantic_embedder = SEMANTIC_CACHE_EMBEDDERS.get(os.environ.get('SEMANTIC_CACHE_EMBEDDER', '').lower())
+semantic_cache = SemanticCache(_semantic_embedder()) if _semantic_embedder else None
+
+# Time-to-first-chunk (seconds) of the most recent streamed call of each source ('model', 'agent').
+# Process-wide, so not per user; per-turn timings are on the tracing spans
+stream_metrics = {}
+
 BASE_PROMPT = (
         "You are an expert advisor assisting a local council officer responsible for housing strategy. "
         "We are exploring options to meet future housing demand in a specific area.\n\n"
@@ -31,14 +57,11 @@ BASE_PROMPT = (
         "Keep the advice concise, strategic, and practical for use in a public sector context.\n\n"
     )
 
-def generate_text(prompt, max_tokens=500, temperature=1):
-    """
-    Generate text using Claude 3.7 Sonnet on AWS Bedrock
-    using an existing inference profile
-    """
-    inference_profile_arn = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
-    
-    request_body = {
+INFERENCE_PROFILE_ARN = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+
+
+def _request_body(prompt, max_tokens, temperature, system=None):
+    body = {
         "anthropic_version": "bedrock-2023-05-31",
         "max_tokens": max_tokens,
         "top_k": 250,
@@ -57,46 +80,305 @@ def generate_text(prompt, max_tokens=500, temperature=1):
             }
         ]
     }
-    
-    response = bedrock.invoke_model(
-        modelId=inference_profile_arn, 
-        contentType="application/json",
-        accept="application/json",
-        body=json.dumps(request_body)
+    if system:
+        # The preamble goes in a system block marked as a prompt cache checkpoint, so warm calls
+        # read it from the cache instead of re-processing it. Claude 3.7 Sonnet only caches prefixes of
+        # 1,024+ tokens; a shorter preamble is processed as normal and reports no cache tokens
+        body["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+    return body
+
+
+def _observe_prompt_cache(name, seconds, usage):
+    """
+    Split a latency by whether the call read its prefix from the prompt cache (warm) or not (cold)
+    """
+    if usage and ('cache_read_input_tokens' in usage or 'cache_creation_input_tokens' in usage):
+        tracing.observe(f"{name}.{'warm' if usage.get('cache_read_input_tokens') else 'cold'}", seconds)
+
+
+def _timed_stream(chunks, source, cache_hit=False, usage=None):
+    """
+    Pass chunks through unchanged, recording the time until the first one arrives.
+    usage is a dict the chunk source fills with token counts as the stream progresses
+    (including cache_read_input_tokens / cache_creation_input_tokens when prompt caching applies)
+    """
+    with tracing.span(f'bedrock.{source}_stream', cache_hit=cache_hit) as span:
+        start = time.perf_counter()
+        first = True
+        for chunk in chunks:
+            if first:
+                stream_metrics[source] = time.perf_counter() - start
+                tracing.observe(f'bedrock.{source}_first_chunk', stream_metrics[source])
+                _observe_prompt_cache(f'bedrock.{source}_first_chunk', stream_metrics[source], usage)
+                span.set(time_to_first_chunk=round(stream_metrics[source], 6))
+                first = False
+            yield chunk
+        if usage:
+            span.set(**usage)
+
+
+def _cached_stream(chunks, key, scope, persist=True):
+    """
+    Pass chunks through and store the joined text once the stream completes
+    """
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    response_cache.set(key, ''.join(parts), scope, persist=persist)
+
+
+def _semantic_lookup(question, scope):
+    if semantic_cache is None:
+        return None
+    try:
+        return semantic_cache.lookup(question, scope)
+    except Exception as e:
+        # A failed embedding only costs the cache lookup, never the answer
+        print(f"Semantic cache lookup failed: {e}")
+        return None
+
+
+def _remember(chunks, question, scope):
+    """
+    Pass chunks through and add the complete answer to the semantic cache
+    """
+    if semantic_cache is None:
+        yield from chunks
+        return
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    try:
+        semantic_cache.add(question, ''.join(parts), scope)
+    except Exception as e:
+        print(f"Semantic cache update failed: {e}")
+
+
+def invalidate_knowledge_base():
+    """
+    Drop cached agent answers and retrieved passages. Call after the knowledge base has been re-synced
+    """
+    for scope in (AGENT_CACHE_SCOPE, KB_CACHE_SCOPE):
+        response_cache.invalidate(scope)
+        if semantic_cache is not None:
+            semantic_cache.invalidate(scope)
+
+
+def generate_text(prompt, max_tokens=500, temperature=1, use_cache=True, client=None, system=BASE_PROMPT):
+    """
+    Generate text using Claude 3.7 Sonnet on AWS Bedrock
+    using an existing inference profile.
+    system (BASE_PROMPT by default, None for none) is sent as a prompt-cached system block;
+    cache read/write token counts are recorded on the bedrock.invoke_model span
+    """
+    key = response_cache.key(prompt, INFERENCE_PROFILE_ARN, max_tokens=max_tokens, temperature=temperature,
+                             system=system)
+    with tracing.span('bedrock.invoke_model', cache_hit=False) as span:
+        if use_cache:
+            cached = response_cache.get(key)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return cached
+
+        request_body = _request_body(prompt, max_tokens, temperature, system)
+
+        start = time.perf_counter()
+        response = (client or bedrock()).invoke_model(
+            modelId=INFERENCE_PROFILE_ARN,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(request_body)
+        )
+
+        # Parse the response
+        with tracing.span('bedrock.parse_response'):
+            response_body = json.loads(response.get('body').read())
+        usage = response_body.get('usage', {})
+        span.set(**usage)
+        _observe_prompt_cache('bedrock.invoke_model', time.perf_counter() - start, usage)
+        content = response_body.get('content')
+        # [0].get('text')
+        text = ''.join((c['text'] for c in content))
+        if use_cache:
+            response_cache.set(key, text, MODEL_CACHE_SCOPE)
+        return text
+
+def stream_text(prompt, max_tokens=500, temperature=1, use_cache=True, client=None, system=BASE_PROMPT,
+                cache_scope=MODEL_CACHE_SCOPE):
+    """
+    Stream text from Claude 3.7 Sonnet as it is generated.
+    Yields text deltas; time-to-first-chunk is recorded in stream_metrics['model'].
+    system is sent as a prompt-cached system block, as for generate_text
+    """
+    key = response_cache.key(prompt, INFERENCE_PROFILE_ARN, max_tokens=max_tokens, temperature=temperature,
+                             system=system)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return _timed_stream(iter([cached]), 'model', cache_hit=True)
+
+    request_body = _request_body(prompt, max_tokens, temperature, system)
+    usage = {}
+
+    def deltas():
+        response = (client or bedrock()).invoke_model_with_response_stream(
+            modelId=INFERENCE_PROFILE_ARN,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(request_body)
+        )
+        for event in response.get('body'):
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            payload = json.loads(chunk['bytes'])
+            if payload.get('type') == 'content_block_delta':
+                text = payload['delta'].get('text')
+                if text:
+                    yield text
+            elif payload.get('type') == 'message_start':
+                usage.update(payload['message'].get('usage', {}))
+            elif payload.get('type') == 'message_delta':
+                usage.update(payload.get('usage', {}))
+
+    stream = _cached_stream(deltas(), key, cache_scope) if use_cache else deltas()
+    return _timed_stream(stream, 'model', usage=usage)
+
+
+# Agent trace usage field -> the Messages API name used for model calls
+AGENT_USAGE_KEYS = {
+    'inputTokens': 'input_tokens',
+    'outputTokens': 'output_tokens',
+    'cacheReadInputTokens': 'cache_read_input_tokens',
+    'cacheWriteInputTokens': 'cache_creation_input_tokens',
+}
+
+
+def _agent_usage(orchestration, usage):
+    # Add the token counts of one model call the agent made, from an orchestration trace event
+    metadata = orchestration.get('modelInvocationOutput', {}).get('metadata', {})
+    for name, value in metadata.get('usage', {}).items():
+        key = AGENT_USAGE_KEYS.get(name, name)
+        usage[key] = usage.get(key, 0) + value
+
+
+def stream_with_knowledge_base(query, max_tokens=500, temperature=1, session_id=session_id, use_cache=True, client=None,
+                               system=BASE_PROMPT, instructions=None):
+    """
+    Stream the agent's answer chunk by chunk as the completion events arrive.
+    Time-to-first-chunk is recorded in stream_metrics['agent'].
+    system (BASE_PROMPT by default) is prepended to the question: InvokeAgent has no system block,
+    and this reaches the model whatever the agent's prompt template contains.
+    instructions (e.g. the forecast JSON request) are appended after the question.
+    With tracing enabled, token counts (including prompt cache reads/writes) come from the agent trace.
+    The agent remembers earlier turns of a session, so cached answers are only reused within the same session
+    """
+    key = response_cache.key(query, AGENT_CACHE_SCOPE, system=system, session_id=session_id, instructions=instructions)
+    if use_cache:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return _timed_stream(iter([cached]), 'agent', cache_hit=True)
+
+    usage = {}
+    trace = tracing.is_enabled()
+
+    def chunks():
+        request = dict(
+            inputText=(system or '') + query + (instructions or ''),
+            agentAliasId=AGENT_ALIAS,
+            agentId=AGENT_ID,
+            sessionId = session_id
+        )
+        if trace:
+            request['enableTrace'] = True
+        response = (client or bedrock_agent()).invoke_agent(**request)
+        for event in response['completion']:
+            if 'chunk' in event:
+                yield event['chunk']['bytes'].decode('utf-8')
+            elif 'trace' in event:
+                _agent_usage(event['trace'].get('trace', {}).get('orchestrationTrace', {}), usage)
+
+    stream = chunks()
+    if use_cache:
+        # Keyed by session, which is gone after a restart, so not worth a place in the SQLite tier
+        stream = _cached_stream(stream, key, AGENT_CACHE_SCOPE, persist=False)
+    return _timed_stream(stream, 'agent', usage=usage)
+
+
+def retrieve_passages(query, number_of_results=5, use_cache=True, client=None):
+    """
+    Retrieve the knowledge base passages most relevant to query, without agent orchestration.
+    Returns a list of {"text", "source", "score"} dicts; results are cached until invalidate_knowledge_base()
+    """
+    key = response_cache.key(query, KB_CACHE_SCOPE, number_of_results=number_of_results)
+    with tracing.span('bedrock.retrieve', cache_hit=False) as span:
+        if use_cache:
+            cached = response_cache.get(key)
+            if cached is not None:
+                span.set(cache_hit=True)
+                return json.loads(cached)
+
+        response = (client or bedrock_agent()).retrieve(
+            knowledgeBaseId=KB_ID,
+            retrievalQuery={'text': query},
+            retrievalConfiguration={'vectorSearchConfiguration': {'numberOfResults': number_of_results}}
+        )
+        passages = [
+            {
+                'text': result['content']['text'],
+                'source': result.get('location', {}).get('s3Location', {}).get('uri'),
+                'score': result.get('score'),
+            }
+            for result in response.get('retrievalResults', [])
+        ]
+        span.set(passages=len(passages))
+        if use_cache:
+            response_cache.set(key, json.dumps(passages), KB_CACHE_SCOPE)
+        return passages
+
+
+def _grounded_prompt(query, passages):
+    context = '\n\n'.join(
+        f'<passage source="{p["source"] or "knowledge base"}">\n{p["text"]}\n</passage>' for p in passages
     )
-    
-    # Parse the response
-    response_body = json.loads(response.get('body').read())
-    content = response_body.get('content')
-    # [0].get('text')
-    text = ''.join((c['text'] for c in content))
-    return text
-
-def get_with_knowledge_base(query, max_tokens=500, temperature=1, session_id=session_id):
-    
-    response = bedrock_agent.invoke_agent(
-        inputText=query,
-        agentAliasId=AGENT_ALIAS,
-        agentId=AGENT_ID,
-        sessionId = session_id
+    return (
+        f"Use these passages from the knowledge base where they are relevant:\n\n{context}\n\n"
+        f"Question: {query}"
     )
 
-    session_id = response['sessionId']
 
-    text_response = ''.join([c['chunk']['bytes'].decode('utf-8') for c in response['completion']])
+def stream_fast_answer(query, max_tokens=500, temperature=1, session_id=None, use_cache=True, client=None,
+                       agent_client=None, system=BASE_PROMPT, number_of_results=5, instructions=None):
+    """
+    Fast path: retrieve knowledge base passages directly and stream a model answer grounded on them,
+    skipping the agent's multi-step orchestration. Takes the same arguments as stream_with_knowledge_base
+    (session_id is accepted but unused); client is the bedrock-runtime client and agent_client the
+    bedrock-agent-runtime client used for retrieval. Passages are retrieved for query alone; instructions
+    only go to the model, and answers that followed instructions are kept out of the semantic cache
+    """
+    remember = use_cache and not instructions
+    if remember:
+        cached = _semantic_lookup(query, KB_CACHE_SCOPE)
+        if cached is not None:
+            return _timed_stream(iter([cached]), 'model', cache_hit=True)
+
+    passages = retrieve_passages(query, number_of_results, use_cache, agent_client)
+    stream = stream_text(_grounded_prompt(query, passages) + (instructions or ''), max_tokens, temperature, use_cache,
+                         client, system, cache_scope=KB_CACHE_SCOPE)
+    return _remember(stream, query, KB_CACHE_SCOPE) if remember else stream
+
+
+def get_with_knowledge_base(query, max_tokens=500, temperature=1, session_id=session_id, use_cache=True, client=None,
+                            system=BASE_PROMPT):
 
-    return text_response
+    return ''.join(stream_with_knowledge_base(query, max_tokens, temperature, session_id, use_cache, client, system))
 
 
 # Example usage
 if __name__ == "__main__":
     #add  user input here
     user_input = "Tell me the impact that there would be if a new development in Durham was all bungalows"
-    prompt = BASE_PROMPT + user_input
-    response = generate_text(prompt)
-    
-    # Extract and print the assistant's message
-    if 'content' in response:
-        for item in response['content']:
-            if item['type'] == 'text':
-                print(item['text'])
\ No newline at end of file
+    response = generate_text(user_input)
+    print(response)
\ No newline at end of file
@@ -0,0 +1,85 @@
+from attrs import define, field
+
+TEXT = 'text'
+MARKDOWN = 'markdown'
+TABLE = 'table'
+CHART = 'chart'
+FILE = 'file'
+ERROR = 'error'
+
+# Messages rendered per page of history; older pages are only rendered on request
+HISTORY_PAGE_SIZE = 20
+
+
+@define
+class MessagePart:
+    """
+    One renderable piece of a chat message. The payload is stored already parsed:
+    str for text/markdown/error, a DataFrame for tables and charts, bytes for files.
+    """
+    kind: str
+    payload: object
+    title: str | None = None
+    x: str | None = None
+    file_name: str | None = None
+    mime: str | None = None
+
+
+@define
+class ChatMessage:
+    role: str
+    parts: list = field(factory=list)
+
+    @classmethod
+    def text(cls, role, text):
+        return cls(role, [MessagePart(TEXT, text)])
+
+
+def render_part(part, ui, key):
+    if part.kind == TEXT:
+        ui.write(part.payload)
+    elif part.kind == MARKDOWN:
+        ui.markdown(part.payload)
+    elif part.kind == TABLE:
+        ui.dataframe(part.payload)
+    elif part.kind == CHART:
+        if part.title:
+            ui.subheader(part.title)
+        ui.line_chart(part.payload, x=part.x)
+    elif part.kind == FILE:
+        ui.download_button(
+            label=part.title or 'Download',
+            data=part.payload,
+            file_name=part.file_name,
+            mime=part.mime,
+            key=key
+        )
+    elif part.kind == ERROR:
+        ui.error(part.payload)
+    else:
+        raise ValueError(f'Unknown message part kind: {part.kind}')
+
+
+def render_message(message, ui, index):
+    """
+    Render a message in its chat bubble. index is the message's position in the history,
+    used to give widgets stable keys across reruns.
+    """
+    with ui.chat_message(message.role):
+        for part_index, part in enumerate(message.parts):
+            render_part(part, ui, key=f'message-{index}-{part_index}')
+
+
+def render_history(messages, ui, state, page_size=HISTORY_PAGE_SIZE):
+    """
+    Render the most recent pages of history. Older messages stay collapsed behind a button,
+    so rerun cost depends on the pages shown rather than on the length of the conversation.
+    """
+    pages = state.get('history_pages', 1)
+    start = max(0, len(messages) - pages * page_size)
+    if start:
+        if ui.button(f'Show earlier messages ({start} hidden)'):
+            state['history_pages'] = pages + 1
+            ui.rerun()
+    for index in range(start, len(messages)):
+        render_message(messages[index], ui, index)
@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from attrs import define
+
+import tracing
+from bedrock_integration import stream_with_knowledge_base
+from chat_history import CHART, ERROR, FILE, MARKDOWN, TABLE, ChatMessage, MessagePart, render_message
+from excel_helper import create_excel_bytes, extract_forecast, EXCEL_FILENAME, EXCEL_MIME, FORECAST_JSON
+from forecast_stream import ForecastStreamParser, forecast_instructions, strip_forecast_json
+from forecast_table import SUMMARY_COLUMNS, summary_frame
+from scenarios import ScenarioParams, params_from_question, run_scenarios
+
+
+# Builds each turn's workbook and scenario bands while the answer streams; shared by all sessions
+_exports = ThreadPoolExecutor(max_workers=4, thread_name_prefix='turn-export')
+
+
+@define
+class ModelResponse:
+    text: str | None
+    error: str | None
+
+
+def _append(messages, message, ui):
+    messages.append(message)
+    render_message(message, ui, len(messages) - 1)
+
+
+def run_turn(prompt, ui, messages, answer_stream=stream_with_knowledge_base, forecast=None, model_forecast=False):
+    """
+    Run one chat turn: stream the answer to prompt, then attach the forecast table, chart and workbook.
+    ui is the streamlit module (or anything with the same calls); new messages are appended to messages.
+    forecast defaults to extract_forecast(). What-if questions also get Monte Carlo scenario bands.
+    The workbook is built in the background while the answer streams, so a turn takes roughly
+    the longer of the two rather than their sum.
+    With model_forecast the model is also asked for its own forecast JSON (passed to answer_stream as
+    instructions, so routing, retrieval and caching still see only prompt); the table and chart grow
+    row by row as its year records stream in, and the workbook is built from them afterwards.
+    The JSON itself is left out of the answer shown and kept in messages.
+    """
+    with tracing.span('turn', model_forecast=model_forecast):
+        return _run_turn(prompt, ui, messages, answer_stream, forecast, model_forecast)
+
+
+def _prepare_export(prompt, forecast):
+    """
+    Everything the turn attaches besides the answer: (xlsx bytes, summary DataFrame, scenario bands, params).
+    Independent of the model's answer, so it runs on a worker thread while the answer streams
+    """
+    if forecast is None:
+        forecast = extract_forecast()
+    bands = None
+    params = params_from_question(prompt)
+    if params is not None:
+        with tracing.span('turn.scenarios', n_sims=params.n_sims):
+            bands = run_scenarios(forecast, params)
+
+    with tracing.span('turn.create_excel'):
+        excel_data, df = create_excel_bytes(forecast, bands)
+    return excel_data, df, bands, params
+
+
+def _grow_forecast(chunks, parser, ui):
+    """
+    Pass chunks through to the answer while parsing them, adding each completed year record
+    to a live table and chart
+    """
+    columns = list(SUMMARY_COLUMNS.values())
+    table = chart = None
+    for chunk in chunks:
+        yield chunk
+        records = parser.feed(chunk)
+        if not records:
+            continue
+        rows = summary_frame(records)
+        rows.index += len(parser.records) - len(records)
+        if table is None:
+            table = ui.dataframe(rows.iloc[:0][columns])
+            chart = ui.line_chart(rows.iloc[:0].set_index('Year')[['Predicted Demand', 'Predicted Supply']])
+        table.add_rows(rows[columns])
+        chart.add_rows(rows.set_index('Year')[['Predicted Demand', 'Predicted Supply']])
+
+
+def _run_turn(prompt, ui, messages, answer_stream, forecast, model_forecast):
+    _append(messages, ChatMessage.text('user', prompt), ui)
+    # A model forecast is only known once it has streamed, so its workbook can't be started early
+    export = None if model_forecast else _exports.submit(_prepare_export, prompt, forecast)
+    parser = ForecastStreamParser()
+
+    with ui.chat_message('assistant'):
+        try:
+            with tracing.span('turn.answer'):
+                if model_forecast:
+                    instructions = forecast_instructions(FORECAST_JSON['forecast'][0])
+                    stream = strip_forecast_json(
+                        _grow_forecast(answer_stream(prompt, instructions=instructions), parser, ui)
+                    )
+                else:
+                    stream = answer_stream(prompt)
+                raw_response = ui.write_stream(stream)
+            response = ModelResponse(text=raw_response, error=None)
+        except Exception as e:
+            response = ModelResponse(text=None, error=str(e))
+        if response.error:
+            print('Invalid response received')
+            print(response.error)
+            ui.write(response.error)
+            ui.write('Invalid response received. Probably a server error. Try again.')
+    if response.error:
+        messages.append(ChatMessage.text('assistant', str(response.error)))
+    else:
+        messages.append(ChatMessage.text('assistant', str(response.text)))
+
+    if export is None:
+        if parser.errors:
+            print(f"Skipped {len(parser.errors)} invalid forecast records: {parser.errors}")
+        if parser.records:
+            forecast = parser.records
+        export = _exports.submit(_prepare_export, prompt, forecast)
+
+    with tracing.span('turn.wait_export'):
+        try:
+            excel_data, df, bands, params = export.result()
+        except Exception as e:
+            print(f"Could not build the forecast file: {type(e).__name__}: {e}")
+            _append(messages, ChatMessage('assistant', [MessagePart(ERROR, f"Could not build the forecast file: {e}")]), ui)
+            return response
+    with tracing.span('turn.render'):
+        parts = [
+            MessagePart(MARKDOWN, "Here is a file with some useful data:"),
+            MessagePart(TABLE, df),
+            MessagePart(CHART, df[['Year', 'Predicted Demand', 'Predicted Supply']], title="Line Chart", x='Year'),
+        ]
+        if bands is not None:
+            label = "Baseline Bungalow Gap Bands" if params == ScenarioParams() else "Bungalow Gap Scenario Bands"
+            parts.append(MessagePart(
+                CHART, bands[['Year', 'Bungalow Gap P5', 'Bungalow Gap P50', 'Bungalow Gap P95']],
+                title=f"{label} ({params.n_sims:,} simulations)", x='Year'
+            ))
+        parts.append(MessagePart(FILE, excel_data, title="📥 Download Excel File", file_name=EXCEL_FILENAME, mime=EXCEL_MIME))
+        _append(messages, ChatMessage('assistant', parts), ui)
+    return response
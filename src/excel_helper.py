@@ -1,9 +1,24 @@
-import boto3
+import hashlib
 import json
-import pandas as pd
+import threading
+from collections import OrderedDict
+from io import BytesIO
+import pyarrow as pa
 from openpyxl import Workbook
 from openpyxl.chart import LineChart, Reference, BarChart
 from openpyxl.utils.dataframe import dataframe_to_rows
+import tracing
+from forecast_store import DEFAULT_SCENARIO, ForecastStore
+from forecast_table import AGE_GROUPS, makeup_frame, makeup_table, summary_frame, summary_table, table_chunks
+
+EXCEL_FILENAME = "bungalow_housing_forecast_analysis2.xlsx"
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Rendered workbooks keyed by forecast content hash, most recently used last
+_EXCEL_CACHE = OrderedDict()
+_EXCEL_CACHE_SIZE = 32
+_EXCEL_CACHE_LOCK = threading.Lock()
 
 # ==========================
 # Forecast JSON (Fixed structure)
@@ -212,55 +227,49 @@ FORECAST_JSON = {
 # ==========================
 # Extract Forecast Data
 # ==========================
-def extract_forecast():
+def extract_forecast(region=None, scenario=DEFAULT_SCENARIO, years=None, store=None):
+    """
+    Forecast records for a region. When a forecast store exists (store, or FORECAST_STORE_PATH),
+    only the requested region/scenario/years slice is loaded from it, as a memory-mapped Arrow table.
+    Otherwise, or if no region is given and the store has none for FORECAST_JSON's region,
+    the inline FORECAST_JSON records are returned. Raises ValueError if a requested region has no records.
+    """
+    store = store or ForecastStore()
+    if store.exists():
+        table = store.load(region or FORECAST_JSON["region"], scenario, years)
+        if table.num_rows:
+            return table
+        if region is not None:
+            raise ValueError(f"No {scenario} forecast for {region} in the forecast store at {store.root}")
     return FORECAST_JSON["forecast"]
 
+def forecast_hash(forecast):
+    digest = hashlib.sha256()
+    if isinstance(forecast, pa.Table):
+        # Hash the column buffers in place; for a memory-mapped table this reads but never copies them
+        digest.update(str(forecast.schema).encode("utf-8"))
+        for column in forecast.columns:
+            for chunk in column.chunks:
+                digest.update(f"{chunk.offset}:{len(chunk)}".encode("utf-8"))
+                for buffer in chunk.buffers():
+                    if buffer is not None:
+                        digest.update(buffer)
+    else:
+        digest.update(json.dumps(forecast, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
 # ==========================
 # Excel File Generation (Updated for Bungalow Analysis)
 # ==========================
-def create_excel(forecast):
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Forecast Summary"
-
-    summary_data = {
-        "Year": [],
-        "Predicted Demand": [],
-        "Predicted Supply": [],
-        "Bungalow Demand": [],
-        "Bungalow Supply": [],
-        "Demand-Supply Gap": [],
-        "Population": [],
-        "Housing Stock": [],
-        "Net Migration": []
-    }
-
-    for year_data in forecast:
-        bd = year_data.get("bungalow_demand", 0)
-        bs = year_data.get("bungalow_supply", 0)
-        summary_data["Year"].append(year_data["year"])
-        summary_data["Predicted Demand"].append(year_data["predicted_demand"])
-        summary_data["Predicted Supply"].append(year_data["predicted_supply"])
-        summary_data["Bungalow Demand"].append(bd)
-        summary_data["Bungalow Supply"].append(bs)
-        summary_data["Demand-Supply Gap"].append(bd - bs)
-        summary_data["Population"].append(year_data["population"])
-        summary_data["Housing Stock"].append(year_data["housing_stock"])
-        summary_data["Net Migration"].append(year_data["net_migration"])
-
-    df = pd.DataFrame(summary_data)
-
-    for row in dataframe_to_rows(df, index=False, header=True):
-        ws.append(row)
-
+def _add_summary_charts(ws, n_rows):
     # Line Chart: Bungalow Demand vs Supply
     chart = LineChart()
     chart.title = "Bungalow Demand vs Supply"
     chart.y_axis.title = "Units"
     chart.x_axis.title = "Year"
 
-    data = Reference(ws, min_col=4, max_col=5, min_row=1, max_row=len(df) + 1)
-    cats = Reference(ws, min_col=1, min_row=2, max_row=len(df) + 1)
+    data = Reference(ws, min_col=4, max_col=5, min_row=1, max_row=n_rows + 1)
+    cats = Reference(ws, min_col=1, min_row=2, max_row=n_rows + 1)
     chart.add_data(data, titles_from_data=True)
     chart.set_categories(cats)
     ws.add_chart(chart, "I2")
@@ -271,34 +280,169 @@ def create_excel(forecast):
     gap_chart.y_axis.title = "Gap (Units)"
     gap_chart.x_axis.title = "Year"
 
-    gap_data = Reference(ws, min_col=6, max_col=6, min_row=1, max_row=len(df) + 1)
+    gap_data = Reference(ws, min_col=6, max_col=6, min_row=1, max_row=n_rows + 1)
     gap_chart.add_data(gap_data, titles_from_data=True)
     gap_chart.set_categories(cats)
     ws.add_chart(gap_chart, "I20")
 
-    # Age Group Distribution Chart (2025)
-    age_groups = list(forecast[0]["population_makeup"]["age_distribution"].keys())
-    age_data = [forecast[0]["population_makeup"]["age_distribution"][age] for age in age_groups]
-
-    for idx, age_group in enumerate(age_groups, start=2):
-        ws[f"I{idx}"] = age_group
-        ws[f"J{idx}"] = age_data[idx - 2]
 
+def _age_chart(age_data_ref, age_cats_ref, year):
     age_chart = BarChart()
-    age_chart.title = "Population Age Distribution (2025)"
+    age_chart.title = f"Population Age Distribution ({year})"
     age_chart.y_axis.title = "Population"
     age_chart.x_axis.title = "Age Group"
 
-    age_data_ref = Reference(ws, min_col=10, max_col=10, min_row=2, max_row=1 + len(age_groups))
     age_chart.add_data(age_data_ref, titles_from_data=True)
-    age_chart.set_categories(Reference(ws, min_col=9, min_row=2, max_row=1 + len(age_groups)))
-    ws.add_chart(age_chart, "L2")
+    age_chart.set_categories(age_cats_ref)
+    return age_chart
+
+
+def _add_scenario_sheet(wb, bands):
+    # Monte Carlo percentile bands from scenarios.run_scenarios, charted as P5/P50/P95 of the bungalow gap
+    ws = wb.create_sheet("Scenario Bands")
+    for row in dataframe_to_rows(bands, index=False, header=True):
+        ws.append(row)
+
+    chart = LineChart()
+    chart.title = "Bungalow Gap Scenario Bands (P5 / P50 / P95)"
+    chart.y_axis.title = "Gap (Units)"
+    chart.x_axis.title = "Year"
+    n_rows = len(bands)
+    for name in ("Bungalow Gap P5", "Bungalow Gap P50", "Bungalow Gap P95"):
+        col = bands.columns.get_loc(name) + 1
+        chart.add_data(Reference(ws, min_col=col, max_col=col, min_row=1, max_row=n_rows + 1), titles_from_data=True)
+    chart.set_categories(Reference(ws, min_col=1, min_row=2, max_row=n_rows + 1))
+    ws.add_chart(chart, "B" + str(n_rows + 4))
+
+
+def _build_workbook(forecast, bands=None):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Forecast Summary"
+
+    df = summary_frame(forecast)
+    makeup = makeup_frame(forecast)
+    if df.empty:
+        raise ValueError("Forecast has no records")
+
+    for row in dataframe_to_rows(df, index=False, header=True):
+        ws.append(row)
+
+    _add_summary_charts(ws, len(df))
+
+    # Age Group Distribution Chart (first forecast year)
+    first_year = int(makeup["Year"].iloc[0])
+    age_groups = AGE_GROUPS
+    age_data = [int(makeup[f"Age {age}"].iloc[0]) for age in age_groups]
+
+    for idx, age_group in enumerate(age_groups, start=2):
+        ws[f"I{idx}"] = age_group
+        ws[f"J{idx}"] = age_data[idx - 2]
+
+    age_data_ref = Reference(ws, min_col=10, max_col=10, min_row=2, max_row=1 + len(age_groups))
+    age_cats_ref = Reference(ws, min_col=9, min_row=2, max_row=1 + len(age_groups))
+    ws.add_chart(_age_chart(age_data_ref, age_cats_ref, first_year), "L2")
+
+    # Population makeup: age, household types, tenure and ethnicity by year
+    makeup_ws = wb.create_sheet("Population Makeup")
+    for row in dataframe_to_rows(makeup, index=False, header=True):
+        makeup_ws.append(row)
+
+    if bands is not None:
+        _add_scenario_sheet(wb, bands)
+
+    return wb, df
+
+
+def _append_table(ws, table):
+    for row in zip(*(column.to_pylist() for column in table.columns)):
+        ws.append(row)
+
+
+def stream_excel(forecast, filename=EXCEL_FILENAME, chunk_size=5000):
+    """
+    Write the forecast workbook with openpyxl write-only worksheets.
+    Records (an iterable of year dicts or an Arrow table) are consumed chunk_size at a time and
+    rows are flushed straight to disk, so memory stays flat regardless of row count.
+    Produces the same charts and data as create_excel without bands, except that the age chart's data
+    goes on its own "Age Distribution" sheet: write-only sheets can't have cells written beside the
+    summary rows as create_excel does. There is no Scenario Bands sheet. Returns the number of rows written.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Forecast Summary")
+    makeup_ws = wb.create_sheet("Population Makeup")
+    age_ws = wb.create_sheet("Age Distribution")
+
+    n_rows = 0
+    for chunk in table_chunks(forecast, chunk_size):
+        summary = summary_table(chunk)
+        makeup = makeup_table(chunk)
+        if n_rows == 0:
+            ws.append(summary.column_names)
+            makeup_ws.append(makeup.column_names)
+
+            first_year = makeup["Year"][0].as_py()
+            age_ws.append(["Age Group", "Population"])
+            for age in AGE_GROUPS:
+                age_ws.append([age, makeup[f"Age {age}"][0].as_py()])
+
+        _append_table(ws, summary)
+        _append_table(makeup_ws, makeup)
+        n_rows += chunk.num_rows
+
+    if n_rows == 0:
+        raise ValueError("Forecast has no records")
+
+    _add_summary_charts(ws, n_rows)
+    age_data_ref = Reference(age_ws, min_col=2, max_col=2, min_row=1, max_row=1 + len(AGE_GROUPS))
+    age_cats_ref = Reference(age_ws, min_col=1, min_row=2, max_row=1 + len(AGE_GROUPS))
+    ws.add_chart(_age_chart(age_data_ref, age_cats_ref, first_year), "L2")
+
+    wb.save(filename)
+    print(f"✅ Excel file '{filename}' created ({n_rows} rows, streamed).")
+    return n_rows
+
+
+def create_excel(forecast, filename=EXCEL_FILENAME, bands=None):
+    wb, df = _build_workbook(forecast, bands)
 
     # Save file
-    wb.save("bungalow_housing_forecast_analysis2.xlsx")
-    print("✅ Excel file 'bungalow_housing_forecast_analysis2.xlsx' created.")
+    wb.save(filename)
+    print(f"✅ Excel file '{filename}' created.")
     return df
 
+
+def create_excel_bytes(forecast, bands=None):
+    """
+    Build the workbook in memory and return (xlsx bytes, summary DataFrame).
+    bands (a scenarios.run_scenarios DataFrame) adds a "Scenario Bands" sheet.
+    Results are memoised by forecast content, so an unchanged forecast is only rendered once per process.
+    """
+    with tracing.span('excel.create_bytes', cache_hit=False) as span:
+        key = forecast_hash(forecast)
+        if bands is not None:
+            key += ":" + bands.to_json(orient="split")
+        with _EXCEL_CACHE_LOCK:
+            cached = _EXCEL_CACHE.get(key)
+            if cached is not None:
+                _EXCEL_CACHE.move_to_end(key)
+        if cached is not None:
+            excel_data, df = cached
+            span.set(cache_hit=True)
+            return excel_data, df.copy()
+
+        wb, df = _build_workbook(forecast, bands)
+        buffer = BytesIO()
+        wb.save(buffer)
+        excel_data = buffer.getvalue()
+
+        with _EXCEL_CACHE_LOCK:
+            _EXCEL_CACHE[key] = (excel_data, df)
+            if len(_EXCEL_CACHE) > _EXCEL_CACHE_SIZE:
+                _EXCEL_CACHE.popitem(last=False)
+        span.set(rows=len(df), bytes=len(excel_data))
+        return excel_data, df.copy()
+
 # ==========================
 # Main Execution
 # ==========================
@@ -0,0 +1,144 @@
+"""
+Forecast store: flat forecast tables saved as uncompressed Arrow IPC files, partitioned by
+region and scenario (hive layout, region=.../scenario=.../). Files are memory-mapped on read,
+so the columns of a loaded slice point straight at the mapped file rather than being copied.
+Filters on region and scenario prune whole files; year filters are applied while scanning.
+
+    python src/forecast_store.py forecasts.jsonl --store forecast_store --scenario baseline
+"""
+import argparse
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow.fs import LocalFileSystem
+
+from forecast_table import forecast_table, regions_table, regions_table_from_json
+
+DEFAULT_STORE_PATH = os.environ.get('FORECAST_STORE_PATH', 'forecast_store')
+DEFAULT_SCENARIO = 'baseline'
+
+PARTITIONING = ds.partitioning(pa.schema([('region', pa.string()), ('scenario', pa.string())]), flavor='hive')
+
+
+class ForecastStore:
+
+    def __init__(self, root=DEFAULT_STORE_PATH):
+        self.root = root
+        self._dataset = None
+
+    def exists(self):
+        return os.path.isdir(self.root) and any(os.scandir(self.root))
+
+    def dataset(self):
+        if self._dataset is None:
+            self._dataset = ds.dataset(
+                self.root, format='ipc', partitioning=PARTITIONING, filesystem=LocalFileSystem(use_mmap=True)
+            )
+        return self._dataset
+
+    def _write(self, table):
+        # Rows are stored in year order so reads never need to sort (sorting would copy every column)
+        ds.write_dataset(
+            table.sort_by('year'), self.root, format='ipc', partitioning=PARTITIONING,
+            existing_data_behavior='delete_matching', basename_template='part-{i}.arrow'
+        )
+        self._dataset = None
+
+    def write(self, region, forecast, scenario=DEFAULT_SCENARIO):
+        """
+        Store (or replace) one region's forecast records for a scenario
+        """
+        table = forecast_table(forecast)
+        table = table.append_column('region', pa.array([region] * table.num_rows, pa.string()))
+        table = table.append_column('scenario', pa.array([scenario] * table.num_rows, pa.string()))
+        self._write(table)
+
+    def write_regions(self, forecasts, scenario=DEFAULT_SCENARIO):
+        """
+        Store many {"region": ..., "forecast": [...]} documents for a scenario in one pass.
+        forecasts may also be a table from regions_table or regions_table_from_json
+        """
+        table = forecasts if isinstance(forecasts, pa.Table) else regions_table(forecasts)
+        table = table.set_column(0, 'region', table['region'].cast(pa.string()))
+        table = table.append_column('scenario', pa.array([scenario] * table.num_rows, pa.string()))
+        self._write(table)
+
+    def index(self):
+        """
+        Region, scenario, first/last year and row count of every stored forecast, as a DataFrame
+        """
+        table = self.dataset().to_table(columns=['region', 'scenario', 'year'])
+        summary = table.group_by(['region', 'scenario']).aggregate([('year', 'min'), ('year', 'max'), ('year', 'count')])
+        return summary.to_pandas().sort_values(['region', 'scenario'], ignore_index=True)
+
+    def regions(self):
+        return sorted(pc.unique(self.dataset().to_table(columns=['region'])['region']).to_pylist())
+
+    def scenarios(self, region=None):
+        table = self.dataset().to_table(
+            columns=['scenario'], filter=None if region is None else ds.field('region') == region
+        )
+        return sorted(pc.unique(table['scenario']).to_pylist())
+
+    def load(self, region=None, scenario=DEFAULT_SCENARIO, years=None, columns=None):
+        """
+        Load a slice of the store as a flat Arrow table in year order.
+
+        region and scenario (None for all) select partitions; years is an inclusive (first, last) range.
+        Without a years filter the returned columns are zero-copy views of the memory-mapped files.
+        By default only the forecast columns are returned, so the result can go straight to
+        create_excel; pass columns to choose others (including 'region' and 'scenario').
+        """
+        dataset = self.dataset()
+        predicate = None
+        for name, value in (('region', region), ('scenario', scenario)):
+            if value is not None:
+                clause = ds.field(name) == value
+                predicate = clause if predicate is None else predicate & clause
+        if years is not None:
+            clause = (ds.field('year') >= years[0]) & (ds.field('year') <= years[1])
+            predicate = clause if predicate is None else predicate & clause
+
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name not in ('region', 'scenario')]
+        return dataset.to_table(columns=columns, filter=predicate)
+
+
+def _read_documents(path):
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.json'):
+                with open(os.path.join(path, name), encoding='utf-8') as f:
+                    yield json.load(f)
+    elif path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding='utf-8') as f:
+            yield json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='JSON file, JSON-lines file or directory of JSON files in FORECAST_JSON shape')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH)
+    parser.add_argument('--scenario', default=DEFAULT_SCENARIO)
+    args = parser.parse_args(argv)
+
+    store = ForecastStore(args.store)
+    if args.source.endswith('.jsonl'):
+        # Arrow parses JSON lines straight into columns, several times faster than json.loads + regions_table
+        forecasts = regions_table_from_json(args.source)
+    else:
+        forecasts = _read_documents(args.source)
+    store.write_regions(forecasts, scenario=args.scenario)
+    print(store.index().to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Incremental parsing of forecast JSON from streamed model output.
+
+ForecastStreamParser is fed text chunks as they arrive and returns each year record of the
+"forecast" array as soon as its closing brace has been seen, without waiting for the rest of the
+reply. Prose or code fences around the JSON are skipped. Records are validated against
+FORECAST_RECORD_SCHEMA (the shape of a FORECAST_JSON record); invalid ones are kept in .errors.
+strip_forecast_json passes on only the prose that comes before the JSON, for display.
+
+    parser = ForecastStreamParser()
+    for chunk in stream:
+        for record in parser.feed(chunk):
+            table.add_rows(summary_frame([record]))
+"""
+import json
+import re
+
+from jsonschema import Draft202012Validator
+
+from forecast_table import AGE_GROUPS, ETHNICITIES, HOUSEHOLD_TYPES, TENURES
+
+
+def _object(keys, value_type):
+    return {
+        "type": "object",
+        "properties": {key: {"type": value_type} for key in keys},
+        "required": list(keys),
+    }
+
+
+FORECAST_RECORD_SCHEMA = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "type": "object",
+    "properties": {
+        "year": {"type": "integer", "minimum": 1900, "maximum": 2200},
+        **{
+            name: {"type": "integer"}
+            for name in ("predicted_demand", "predicted_supply", "demand_supply_gap", "population",
+                         "housing_stock", "net_migration", "bungalow_demand", "bungalow_supply")
+        },
+        "population_makeup": {
+            "type": "object",
+            "properties": {
+                "age_distribution": _object(AGE_GROUPS, "integer"),
+                "household_types": _object(HOUSEHOLD_TYPES, "integer"),
+                "tenure": _object(TENURES, "number"),
+                "ethnicity": _object(ETHNICITIES, "number"),
+            },
+            "required": ["age_distribution", "household_types", "tenure", "ethnicity"],
+        },
+    },
+    "required": ["year", "predicted_demand", "predicted_supply", "population", "housing_stock",
+                 "net_migration", "bungalow_demand", "bungalow_supply", "population_makeup"],
+}
+
+_validator = Draft202012Validator(FORECAST_RECORD_SCHEMA)
+
+FORECAST_ARRAY_PATTERN = re.compile(r'"forecast"\s*:\s*\[')
+
+# Where the JSON part of a reply begins: its opening brace or the code fence around it
+JSON_START_PATTERN = re.compile(r'```|\{')
+
+# Longest tail of unmatched text kept while looking for the "forecast" key across chunk boundaries
+_SEEK_OVERLAP = 64
+
+FORECAST_INSTRUCTIONS = (
+    "\n\nAfter your answer, end your reply with your own year-by-year forecast as JSON in this exact shape, "
+    "one object per year, with whole numbers except tenure and ethnicity percentages:\n"
+    '{"region": "...", "forecast": [%s, ...]}'
+)
+
+
+def forecast_instructions(example_record):
+    """
+    Prompt suffix asking the model for forecast JSON shaped like example_record
+    """
+    return FORECAST_INSTRUCTIONS % json.dumps(example_record)
+
+
+def validation_error(record):
+    """
+    The first schema violation in a record as a message, or None if it is valid
+    """
+    error = next(_validator.iter_errors(record), None)
+    if error is None:
+        return None
+    path = '.'.join(str(p) for p in error.absolute_path)
+    return f"{path}: {error.message}" if path else error.message
+
+
+class ForecastStreamParser:
+    """
+    Push parser for the "forecast" array of a streamed JSON reply. Each character is looked at once,
+    so feeding a reply chunk by chunk costs the same as parsing it whole
+    """
+
+    def __init__(self):
+        self.records = []
+        self.errors = []
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'seek'
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self):
+        return self._state == 'done'
+
+    def feed(self, text):
+        """
+        Consume a chunk; returns the valid records completed by it, in order
+        """
+        if self._state == 'done':
+            return []
+        self._buffer += text
+        completed = []
+        while self._state != 'done':
+            if self._state == 'seek':
+                match = FORECAST_ARRAY_PATTERN.search(self._buffer, self._pos)
+                if match is None:
+                    self._pos = max(self._pos, len(self._buffer) - _SEEK_OVERLAP)
+                    break
+                self._pos = match.end()
+                self._state = 'array'
+            elif not self._scan(completed):
+                break
+        self._compact()
+        return completed
+
+    def _scan(self, completed):
+        # Walk the array from self._pos; returns False when the buffer runs out
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._record(buffer[self._start:i + 1], completed)
+                    self._start = None
+            elif char == ']' and self._depth == 0:
+                self._pos = i + 1
+                self._state = 'done'
+                return True
+        self._pos = len(buffer)
+        return False
+
+    def _record(self, text, completed):
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError as e:
+            self.errors.append(f"record {len(self.records) + len(self.errors) + 1}: {e}")
+            return
+        error = validation_error(record)
+        if error:
+            self.errors.append(f"record {len(self.records) + len(self.errors) + 1}: {error}")
+            return
+        self.records.append(record)
+        completed.append(record)
+
+    def _compact(self):
+        # Drop text that can no longer be part of a record, keeping an open record's start
+        keep = self._start if self._start is not None else self._pos
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._pos -= keep
+            if self._start is not None:
+                self._start = 0
+
+
+def iter_forecast_records(chunks):
+    """
+    Yield valid forecast records from an iterable of text chunks as soon as each one is complete
+    """
+    parser = ForecastStreamParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+
+
+def strip_forecast_json(chunks):
+    """
+    Yield the text of a streamed reply up to where its JSON (or the code fence around it) begins.
+    The rest of chunks is still consumed, so a parser earlier in the pipeline sees the whole reply
+    """
+    held = ''
+    for chunk in chunks:
+        if held is None:
+            continue
+        text = held + chunk
+        match = JSON_START_PATTERN.search(text)
+        if match:
+            held, text = None, text[:match.start()]
+        else:
+            # Trailing backticks may be the start of a code fence split across chunks
+            visible = text.rstrip('`')
+            held, text = text[len(visible):], visible
+        if text:
+            yield text
+    if held:
+        yield held
@@ -1,67 +1,72 @@
+import functools
 import os
+import uuid
 import streamlit as st
-from streamlit.errors import StreamlitAPIException
-import ast
-import random
-from attrs import define
-from bedrock_integration import generate_text, BASE_PROMPT, get_with_knowledge_base
-from excel_helper import create_excel, FORECAST_JSON
-
-st.title('Dwella')
+import tracing
+from agent_sessions import get_default_pool
+from answer_modes import AGENT, MODES, routed_stream
+from chat_history import render_history
+from chat_turn import run_turn
+from excel_helper import extract_forecast
+from forecast_store import DEFAULT_SCENARIO, ForecastStore
 
+if os.environ.get('PREDICTIVE_PLANNING_METRICS_PORT'):
+    tracing.enable()
+    tracing.start_metrics_server(int(os.environ['PREDICTIVE_PLANNING_METRICS_PORT']))
 
-@define
-class ModelResponse:
-    text: str | None
-    error: str | None
+st.title('Dwella')
 
 if 'messages' not in st.session_state:
     st.session_state.messages = []
+if 'session_key' not in st.session_state:
+    st.session_state.session_key = uuid.uuid4().hex
 
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        try:
-            df_content = ast.literal_eval(message["content"])
-            st.dataframe(df_content)
-        except (SyntaxError, ValueError, StreamlitAPIException):
-            st.write(message["content"])
+messages = st.session_state.messages
+with tracing.span('history.render', messages=len(messages)):
+    render_history(messages, st, st.session_state)
+
+with st.sidebar:
+    answer_mode = st.radio('Answer mode', MODES, index=MODES.index(AGENT), help='Fast answers from the knowledge base directly; Agent uses full agent orchestration')
+    model_forecast = st.checkbox('Ask the model for a forecast', help='Show the forecast the model returns, row by row as it streams')
+
+# The store, its region/scenario lists and loaded slices are shared across reruns and sessions;
+# they are refreshed every few minutes so regions written by forecast_store.py appear without a restart
+STORE_REFRESH_SECONDS = 300
 
-if prompt:= st.chat_input('What do you want to know about the data?'):
-    st.session_state.messages.append({'role': 'user', 'content': prompt})
-    with st.chat_message('user'):
-        st.markdown(prompt)
-    raw_response = get_with_knowledge_base(BASE_PROMPT + prompt)
-    response = ModelResponse(text=raw_response, error=None)
-    if response.error:
-        st.session_state.messages.append({'role': 'assistant', 'content': str(response.error)})
-        with st.chat_message('assistant'):
-            print('Invalid response received')
-            print(response.error)
-            st.write(response.error)
-            st.write('Invalid response received. Probably a server error. Try again.')
-    else:
-        result = response.text
-        st.session_state.messages.append({'role': 'assistant', 'content': str(result)})
-        with st.chat_message('assistant'):
-            st.write(result)
 
-    with st.chat_message('assistant'):
-        st.markdown("Here is a file with some useful data:")
-        try:
-            df = create_excel(FORECAST_JSON['forecast'])
-            st.dataframe(df)
-            with open("bungalow_housing_forecast_analysis2.xlsx", "rb") as f:
-                excel_data = f.read()
+@st.cache_resource(ttl=STORE_REFRESH_SECONDS)
+def forecast_store():
+    return ForecastStore()
 
-            chart_data = df[['Year', 'Predicted Demand', 'Predicted Supply']]
-            st.subheader("Line Chart")
-            st.line_chart(chart_data, x='Year')
 
-            st.download_button(
-                label="📥 Download Excel File",
-                data=excel_data,
-                file_name="bungalow_housing_forecast_analysis2.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        except FileNotFoundError:
-            st.error("Excel file not found. Make sure it's named correctly and exists.")
+@st.cache_data(ttl=STORE_REFRESH_SECONDS)
+def store_scenarios():
+    """
+    {region: [scenario, ...]} for everything in the store, from one scan
+    """
+    store = forecast_store()
+    if not store.exists():
+        return {}
+    index = store.index()
+    return {region: list(group['scenario']) for region, group in index.groupby('region', sort=True)}
+
+
+@st.cache_resource(ttl=STORE_REFRESH_SECONDS, max_entries=32)
+def load_forecast(region, scenario):
+    return extract_forecast(region, scenario, store=forecast_store())
+
+
+forecast = None
+regions = store_scenarios()
+if regions:
+    with st.sidebar:
+        region = st.selectbox('Region', list(regions))
+        scenarios = regions[region]
+        scenario = st.selectbox('Scenario', scenarios, index=scenarios.index(DEFAULT_SCENARIO) if DEFAULT_SCENARIO in scenarios else 0)
+    forecast = load_forecast(region, scenario)
+
+if prompt:= st.chat_input('What do you want to know about the data?'):
+    agent_stream = functools.partial(get_default_pool().stream, st.session_state.session_key)
+    answer_stream = functools.partial(routed_stream, mode=answer_mode, agent_stream=agent_stream,
+                                      first_turn=not messages)
+    run_turn(prompt, st, messages, answer_stream=answer_stream, forecast=forecast, model_forecast=model_forecast)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from cachetools import TTLCache
+
+DEFAULT_CACHE_PATH = os.environ.get('BEDROCK_CACHE_PATH', os.path.join('.cache', 'bedrock_responses.sqlite3'))
+
+
+def normalise_prompt(prompt):
+    """
+    Collapse whitespace and case so trivially different prompts share a cache entry
+    """
+    return ' '.join(prompt.split()).casefold()
+
+
+class ResponseCache:
+    """
+    Two-tier cache for model and agent responses.
+
+    An in-process LRU (with TTL) sits in front of a SQLite table that survives
+    restarts. Entries are tagged with a scope (e.g. the agent or model id) so a
+    whole scope can be invalidated, e.g. after the knowledge base is re-synced.
+    Entries that can't be reused after a restart (persist=False) stay in memory only.
+    """
+
+    # Memory hits are written back to the disk LRU order in batches of this size, and before any eviction
+    TOUCH_BATCH_SIZE = 64
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_entries=256, max_disk_entries=5000, ttl=24 * 60 * 60):
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=max_memory_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._touched = {}
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def _db(self):
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, scope TEXT, value TEXT, created REAL, accessed REAL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope)')
+        return self._conn
+
+    @staticmethod
+    def key(prompt, target, **params):
+        """
+        Build a cache key from the normalised prompt, the model/agent id and generation parameters
+        """
+        material = json.dumps([normalise_prompt(prompt), target, params], sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self.stats['memory_hits'] += 1
+                self._touched[key] = time.time()
+                if len(self._touched) >= self.TOUCH_BATCH_SIZE:
+                    self._flush_touched()
+                    self._db().commit()
+                return self._memory[key][1]
+
+            now = time.time()
+            db = self._db()
+            row = db.execute('SELECT scope, value, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None or now - row[2] > self.ttl:
+                self.stats['misses'] += 1
+                return None
+
+            db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+            db.commit()
+            self._memory[key] = (row[0], row[1])
+            self.stats['disk_hits'] += 1
+            return row[1]
+
+    def _flush_touched(self):
+        if self._touched:
+            self._db().executemany('UPDATE responses SET accessed = ? WHERE key = ?',
+                                   [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def set(self, key, value, scope, persist=True):
+        """
+        Store value under key. With persist=False it is kept in memory only, e.g. for answers tied
+        to a conversation that won't exist after a restart
+        """
+        with self._lock:
+            now = time.time()
+            self._memory[key] = (scope, value)
+            if not persist:
+                return
+            db = self._db()
+            self._flush_touched()
+            db.execute(
+                'INSERT OR REPLACE INTO responses (key, scope, value, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, scope, value, now, now)
+            )
+            db.execute('DELETE FROM responses WHERE created < ?', (now - self.ttl,))
+            db.execute(
+                'DELETE FROM responses WHERE key NOT IN '
+                '(SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)',
+                (self.max_disk_entries,)
+            )
+            db.commit()
+
+    def invalidate(self, scope=None):
+        """
+        Drop every entry in a scope, or the whole cache if no scope is given
+        """
+        with self._lock:
+            db = self._db()
+            if scope is None:
+                self._memory.clear()
+                db.execute('DELETE FROM responses')
+            else:
+                for key in [k for k, (s, _) in self._memory.items() if s == scope]:
+                    del self._memory[key]
+                db.execute('DELETE FROM responses WHERE scope = ?', (scope,))
+            db.commit()
+
+    @property
+    def hits(self):
+        return self.stats['memory_hits'] + self.stats['disk_hits']
+
+    @property
+    def misses(self):
+        return self.stats['misses']
@@ -1,55 +1,205 @@
+import io
 import json
+import threading
+import numpy as np
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def invoke_sagemaker_endpoint(endpoint_url, input_data, content_type="application/json", custom_auth_header_name=None, custom_auth_header_value=None):
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+JSON = "application/json"
+NPY = "application/x-npy"
+CSV = "text/csv"
+
+# Returned by endpoints that can't read the request body or produce the requested Accept type
+UNSUPPORTED_FORMAT_STATUS_CODES = (406, 415)
+
+
+def encode_payload(input_data, content_type=JSON):
+    """
+    Request body for input_data. NumPy arrays and DataFrames are written directly as .npy bytes or CSV
+    (no header or index), or as a JSON list for application/json; dicts become JSON; anything else str()
+    """
+    if isinstance(input_data, (np.ndarray, pd.DataFrame)):
+        if content_type == NPY:
+            buffer = io.BytesIO()
+            np.save(buffer, input_data.to_numpy() if isinstance(input_data, pd.DataFrame) else input_data,
+                    allow_pickle=False)
+            return buffer.getvalue()
+        if content_type == CSV:
+            return pd.DataFrame(input_data).to_csv(header=False, index=False)
+        if content_type == JSON:
+            return json.dumps(np.asarray(input_data).tolist())
+    if isinstance(input_data, dict) and content_type == JSON:
+        return json.dumps(input_data)
+    if isinstance(input_data, (str, bytes)):
+        return input_data
+    return str(input_data) #convert to string if it is not a dict or string.
+
+
+def decode_response(response):
+    """
+    Decode a response by its Content-Type: .npy and CSV bodies load straight into NumPy arrays
+    (single-column CSV as a 1-D array), JSON into Python objects, anything else is returned as text
+    """
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if content_type == NPY:
+        return np.load(io.BytesIO(response.content), allow_pickle=False)
+    if content_type == CSV:
+        values = pd.read_csv(io.BytesIO(response.content), header=None).to_numpy()
+        # One prediction per line is a vector, the same shape as the .npy response
+        return values[:, 0] if values.shape[1] == 1 else values
+    try:
+        return response.json()
+    except json.JSONDecodeError:
+        # If the response is not JSON, return the raw text
+        return response.text
+
+
+class SageMakerClient:
+    """
+    Reusable client for invoking SageMaker endpoints over a pooled, keep-alive requests.Session.
+
+    Connections are kept open between calls, so repeated predictions skip TCP and TLS setup.
+    Throttled (429) and 5xx responses and connection errors are retried with exponential
+    backoff plus random jitter.
+
+    Args:
+        pool_size (int, optional): Connections kept open per host. Size it to the number of
+            threads calling the client concurrently. Defaults to 10.
+        timeout (float or tuple, optional): (connect, read) timeout in seconds. Defaults to (3.05, 60).
+        max_retries (int, optional): Retries after the first attempt. Defaults to 3.
+        backoff_factor (float, optional): Base of the exponential backoff in seconds. Defaults to 0.5.
+        backoff_jitter (float, optional): Up to this many seconds of random delay added to each backoff.
+            Defaults to 0.5.
+        verify (bool, optional): Verify SSL certificates. Defaults to False, matching invoke_sagemaker_endpoint.
+
+    Request and response formats can be set per endpoint with set_formats, e.g. NPY both ways for a
+    model that takes feature matrices. If the endpoint rejects them (406/415) the client falls back
+    to JSON for that endpoint and remembers it.
+    """
+
+    def __init__(self, pool_size=10, timeout=(3.05, 60), max_retries=3, backoff_factor=0.5, backoff_jitter=0.5, verify=False):
+        self.timeout = timeout
+        self.verify = verify
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._formats = {}
+        self._formats_lock = threading.Lock()
+
+    def set_formats(self, endpoint_url, content_type=NPY, accept=NPY):
+        """
+        Use content_type for request bodies and ask for accept responses from this endpoint
+        """
+        with self._formats_lock:
+            self._formats[endpoint_url] = (content_type, accept)
+
+    def formats(self, endpoint_url):
+        """
+        (content_type, accept) currently used for an endpoint; JSON both ways unless set
+        """
+        return self._formats.get(endpoint_url, (JSON, JSON))
+
+    def invoke(self, endpoint_url, input_data, content_type=None, custom_auth_header_name=None, custom_auth_header_value=None,
+               accept=None):
+        """
+        Invoke an endpoint. Arguments and return value are as for invoke_sagemaker_endpoint.
+        content_type and accept default to the endpoint's formats (see set_formats); NumPy arrays
+        and DataFrames are encoded to match, and NPY/CSV responses come back as NumPy arrays.
+        """
+        negotiated = content_type is None and accept is None
+        default_content_type, default_accept = self.formats(endpoint_url)
+        content_type = content_type or default_content_type
+        accept = accept or default_accept
+
+        headers = {'Content-Type': content_type, 'Accept': accept}
+        if custom_auth_header_name and custom_auth_header_value:
+            headers[custom_auth_header_name] = custom_auth_header_value
+
+        try:
+            data = encode_payload(input_data, content_type)
+            response = self.session.post(endpoint_url, data=data, headers=headers, verify=self.verify, timeout=self.timeout)
+            if (negotiated and response.status_code in UNSUPPORTED_FORMAT_STATUS_CODES
+                    and (content_type, accept) != (JSON, JSON)):
+                print(f"Endpoint rejected {content_type} -> {accept}; falling back to JSON")
+                self.set_formats(endpoint_url, JSON, JSON)
+                return self.invoke(endpoint_url, input_data, None, custom_auth_header_name, custom_auth_header_value)
+            response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+
+            return decode_response(response)
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error invoking endpoint: {e}")
+            return None
+        except Exception as ex:
+            print(f"An unexpected error occurred: {ex}")
+            return None
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """
+    Process-wide SageMakerClient shared by invoke_sagemaker_endpoint
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = SageMakerClient()
+        return _default_client
+
+
+def invoke_sagemaker_endpoint(endpoint_url, input_data, content_type=None, custom_auth_header_name=None, custom_auth_header_value=None,
+                              accept=None):
     """
     Invokes a SageMaker endpoint using the requests library.
+    Calls share a pooled keep-alive session (see SageMakerClient) and retry on 429 and 5xx responses.
 
     Args:
         endpoint_url (str): The URL of the SageMaker endpoint.
-        input_data (dict or str): The input data to send to the model.  If it's a dict,
-            it will be converted to a JSON string (if content_type is application/json).
+        input_data (dict, str, numpy.ndarray or pandas.DataFrame): The input data to send to the model.
+            If it's a dict, it will be converted to a JSON string (if content_type is application/json).
+            Arrays and DataFrames are encoded as .npy, CSV or a JSON list to match content_type.
             If it's already a string, it's sent as is.
         content_type (str, optional): The content type of the input data.
-            Defaults to "application/json".
+            Defaults to the endpoint's format (see SageMakerClient.set_formats), else "application/json".
         custom_auth_header_name (str, optional): Name of a custom authorization header.
             Defaults to None.
         custom_auth_header_value (str, optional): Value of the custom authorization header.
             Defaults to None.
+        accept (str, optional): Response content type to ask for. Defaults like content_type.
 
     Returns:
         dict: The model's prediction, as a Python dictionary (if the response is JSON),
-              or the raw response text if the response is not JSON.  Returns None on error.
+              a NumPy array (if the response is application/x-npy or text/csv),
+              or the raw response text otherwise.  Returns None on error.
     """
-    headers = {'Content-Type': content_type}
-    if custom_auth_header_name and custom_auth_header_value:
-        headers[custom_auth_header_name] = custom_auth_header_value
-
-    # Convert input_data to JSON string if it's a dictionary and content type is json
-    if isinstance(input_data, dict) and content_type == "application/json":
-        input_data = json.dumps(input_data)
-    elif not isinstance(input_data, str):
-        input_data = str(input_data) #convert to string if it is not a dict or string.
-
-    try:
-        # Disable SSL verification (use with caution!)
-        response = requests.post(endpoint_url, data=input_data, headers=headers, verify=False) #Added verify=False
-        response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-
-        # Attempt to decode the response as JSON
-        try:
-            return response.json()
-        except json.JSONDecodeError:
-            # If the response is not JSON, return the raw text
-            return response.text
-
-    except requests.exceptions.RequestException as e:
-        print(f"Error invoking endpoint: {e}")
-        return None
-    except Exception as ex:
-        print(f"An unexpected error occurred: {ex}")
-        return None
-
+    return get_default_client().invoke(endpoint_url, input_data, content_type, custom_auth_header_name, custom_auth_header_value,
+                                       accept)
 
 
 def main():
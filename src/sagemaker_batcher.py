@@ -0,0 +1,141 @@
+import queue
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from sagemaker import JSON, get_default_client
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Collects single prediction requests into batched SageMaker invocations.
+
+    Each submitted feature vector waits at most max_wait seconds (or until max_batch_size
+    requests are queued) and is then sent with the others as one {"instances": [...]} payload.
+    The endpoint's predictions are scattered back, in order, to each caller's Future.
+
+    Args:
+        endpoint_url (str): The URL of the SageMaker endpoint.
+        max_batch_size (int, optional): Most instances per invocation. Defaults to 32.
+        max_wait (float, optional): Longest a request waits for others to join its batch, in seconds.
+            Defaults to 0.01.
+        max_concurrent_batches (int, optional): Batches in flight at once. Defaults to 2.
+        client (SageMakerClient, optional): Client used to send batches. Defaults to the shared client.
+    """
+
+    def __init__(self, endpoint_url, max_batch_size=32, max_wait=0.01, max_concurrent_batches=2, client=None,
+                 custom_auth_header_name=None, custom_auth_header_value=None):
+        self.endpoint_url = endpoint_url
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.client = client or get_default_client()
+        self.auth_header = (custom_auth_header_name, custom_auth_header_value)
+
+        self._queue = queue.Queue()
+        self._senders = ThreadPoolExecutor(max_workers=max_concurrent_batches)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._batch_sizes = Counter()
+        self._queue_delays = deque(maxlen=10_000)
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def submit(self, instance):
+        """
+        Queue one feature vector; returns a Future resolving to its prediction.
+        Raises RuntimeError once the batcher is closed
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.put((instance, future, time.perf_counter()))
+        return future
+
+    def predict(self, instance, timeout=None):
+        return self.submit(instance).result(timeout)
+
+    def _collect(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._senders.submit(self._send, batch)
+                    return
+                batch.append(item)
+            self._senders.submit(self._send, batch)
+
+    def _send(self, batch):
+        sent = time.perf_counter()
+        with self._lock:
+            self._batch_sizes[len(batch)] += 1
+            self._queue_delays.extend(sent - queued for _, _, queued in batch)
+
+        try:
+            response = self.client.invoke(self.endpoint_url, {"instances": [instance for instance, _, _ in batch]},
+                                          content_type=JSON, accept=JSON,
+                                          custom_auth_header_name=self.auth_header[0],
+                                          custom_auth_header_value=self.auth_header[1])
+            predictions = response.get("predictions") if isinstance(response, dict) else response
+            if not isinstance(predictions, list) or len(predictions) != len(batch):
+                raise RuntimeError(f"Expected {len(batch)} predictions from endpoint, got {response!r:.200}")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), prediction in zip(batch, predictions):
+            future.set_result(prediction)
+
+    @property
+    def metrics(self):
+        """
+        Batch-size distribution and queue delay (seconds from submit to send) statistics
+        """
+        with self._lock:
+            sizes = Counter(self._batch_sizes)
+            delays = sorted(self._queue_delays)
+        batches = sum(sizes.values())
+        requests = sum(size * count for size, count in sizes.items())
+        return {
+            "batches": batches,
+            "requests": requests,
+            "mean_batch_size": requests / batches if batches else 0.0,
+            "batch_size_histogram": dict(sorted(sizes.items())),
+            "queue_delay_p50": statistics.median(delays) if delays else 0.0,
+            "queue_delay_p95": delays[int(len(delays) * 0.95)] if delays else 0.0,
+            "queue_delay_max": delays[-1] if delays else 0.0,
+        }
+
+    def close(self):
+        """
+        Flush queued requests and stop the background threads. Later submits raise RuntimeError
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._collector.join()
+        self._senders.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
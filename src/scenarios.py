@@ -0,0 +1,214 @@
+"""
+Vectorised Monte Carlo what-if engine over the forecast fields.
+
+Each simulation perturbs the forecast year by year:
+- demand follows a log-normal random walk around predicted_demand, plus households formed by
+  net migration above or below forecast (migrants / persons per dwelling);
+- supply varies independently each year around predicted_supply (delivery risk);
+- the 65+ population (population_makeup.age_distribution) follows a log-normal random walk around
+  its forecast, and bungalow demand moves with total demand and with that simulated 65+ population
+  (records without 65+ figures leave bungalow demand to total demand alone);
+- bungalow supply keeps its forecast share of supply unless bungalow_share overrides it,
+  and a one-off development of development_units homes can be added, delivered evenly over
+  its first development_years forecast years (all of them by default).
+
+All simulations run at once as (n_years, n_sims) float32 NumPy arrays.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+from attrs import frozen
+
+from forecast_table import forecast_table
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+METRICS = ("Demand", "Supply", "Gap", "Population 65+", "Bungalow Demand", "Bungalow Supply", "Bungalow Gap")
+
+_CACHE = OrderedDict()
+_CACHE_SIZE = 64
+_CACHE_LOCK = threading.Lock()
+
+
+@frozen
+class ScenarioParams:
+    n_sims: int = 100_000
+    demand_volatility: float = 0.04
+    supply_volatility: float = 0.10
+    migration_volatility: float = 0.25
+    older_population_volatility: float = 0.01
+    bungalow_share: float | None = None
+    development_units: int = 0
+    development_bungalow_share: float = 1.0
+    development_years: int | None = None
+    seed: int = 0
+
+
+def _inputs(forecast):
+    table = forecast_table(forecast)
+    columns = {
+        "year": "year",
+        "demand": "predicted_demand",
+        "supply": "predicted_supply",
+        "population": "population",
+        "housing_stock": "housing_stock",
+        "net_migration": "net_migration",
+        "bungalow_demand": "bungalow_demand",
+        "bungalow_supply": "bungalow_supply",
+        "older_population": "population_makeup.age_distribution.65+",
+    }
+    return {
+        key: pc.fill_null(table[column], 0).to_numpy().astype(np.float64)
+        for key, column in columns.items()
+    }
+
+
+def _key(inputs, params):
+    digest = hashlib.sha256(repr(params).encode("utf-8"))
+    for name in sorted(inputs):
+        digest.update(inputs[name].tobytes())
+    return digest.hexdigest()
+
+
+def simulate(inputs, params):
+    """
+    Draw params.n_sims paths. Returns {metric: array of shape (n_years, n_sims)}; years are
+    rows so per-year percentiles run over contiguous memory
+    """
+    rng = np.random.default_rng(params.seed)
+    n_years = len(inputs["year"])
+    shape = (n_years, params.n_sims)
+    column = {name: values.astype(np.float32)[:, None] for name, values in inputs.items()}
+    steps = np.arange(1, n_years + 1, dtype=np.float32)[:, None]
+
+    def normal(rows=n_years):
+        return rng.standard_normal((rows, params.n_sims), dtype=np.float32)
+
+    sd = params.demand_volatility
+    demand = column["demand"] * np.exp(sd * np.cumsum(normal(), axis=0) - 0.5 * sd ** 2 * steps)
+
+    persons_per_dwelling = np.divide(column["population"], column["housing_stock"],
+                                     out=np.ones_like(column["population"]), where=column["housing_stock"] > 0)
+    demand += params.migration_volatility * np.abs(column["net_migration"]) * normal() / persons_per_dwelling
+
+    sd = params.supply_volatility
+    supply = column["supply"] * np.exp(sd * normal() - 0.5 * sd ** 2)
+
+    demand_ratio = np.divide(demand, column["demand"], out=np.ones(shape, np.float32), where=column["demand"] > 0)
+    sd = params.older_population_volatility
+    older_population = column["older_population"] * np.exp(sd * np.cumsum(normal(), axis=0) - 0.5 * sd ** 2 * steps)
+    older_ratio = np.divide(older_population, column["older_population"], out=np.ones(shape, np.float32),
+                            where=column["older_population"] > 0)
+    bungalow_demand = column["bungalow_demand"] * demand_ratio * older_ratio
+
+    if params.bungalow_share is None:
+        forecast_share = np.divide(column["bungalow_supply"], column["supply"],
+                                   out=np.zeros_like(column["supply"]), where=column["supply"] > 0)
+        bungalow_supply = supply * forecast_share
+    else:
+        bungalow_supply = supply * np.float32(params.bungalow_share)
+
+    if params.development_units:
+        years = min(params.development_years or n_years, n_years)
+        delivered = np.zeros((n_years, 1), dtype=np.float32)
+        delivered[:years] = params.development_units / years
+        supply += delivered
+        bungalow_supply += delivered * np.float32(params.development_bungalow_share)
+
+    return {
+        "Demand": demand,
+        "Supply": supply,
+        "Gap": demand - supply,
+        "Population 65+": older_population,
+        "Bungalow Demand": bungalow_demand,
+        "Bungalow Supply": bungalow_supply,
+        "Bungalow Gap": bungalow_demand - bungalow_supply,
+    }
+
+
+def run_scenarios(forecast, params=ScenarioParams()):
+    """
+    Percentile bands per year for each metric, plus the probability of a bungalow shortfall.
+    Columns are Year, "<metric> P<percentile>" and "Bungalow Shortfall Probability".
+    Results are cached per forecast content and parameter set.
+    """
+    inputs = _inputs(forecast)
+    key = _key(inputs, params)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None:
+            _CACHE.move_to_end(key)
+            return cached.copy()
+
+    paths = simulate(inputs, params)
+    bands = {"Year": inputs["year"].astype(int)}
+    for metric in METRICS:
+        values = np.percentile(paths[metric], PERCENTILES, axis=1)
+        for p, row in zip(PERCENTILES, values):
+            bands[f"{metric} P{p}"] = np.round(row).astype(int)
+    bands["Bungalow Shortfall Probability"] = (paths["Bungalow Gap"] > 0).mean(axis=1).round(3)
+    result = pd.DataFrame(bands)
+
+    with _CACHE_LOCK:
+        _CACHE[key] = result
+        if len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return result.copy()
+
+
+# "If ..." only counts when the clause changes what gets built: "if we built 500 homes", not "if the council approves"
+WHAT_IF_PATTERN = re.compile(
+    r"\bwhat (?:if|would happen if)\b|\bscenarios?\b|\bsimulat\w*|\bsuppose\b|\bimagine\b|"
+    r"\bif\b[^.?!,;]*\b(?:build|built|builds|building|deliver\w*|develop\w*|add|added|adding|were|was)\b",
+    re.IGNORECASE
+)
+UNITS_PATTERN = re.compile(r"(\d[\d,]*)\s*(?:new\s+)?(?:homes|houses|units|dwellings|bungalows)", re.IGNORECASE)
+# "all bungalows", "all new homes were bungalows"
+ALL_BUNGALOWS_PATTERN = re.compile(r"\ball(?:\s+[\w-]+){0,4}?\s+bungalows\b", re.IGNORECASE)
+DEVELOPMENT_PATTERN = re.compile(r"\b(?:development|scheme|site|estate)s?\b", re.IGNORECASE)
+DEVELOPMENT_YEARS_PATTERN = re.compile(r"\b(?:over|across|within|in)\s+(\d{1,2})\s+years\b", re.IGNORECASE)
+# "Simulate the bungalow gap", "run the scenarios": asks for the baseline bands even when nothing changes
+BASELINE_PATTERN = re.compile(r"\bsimulat\w*|\bscenarios?\b", re.IGNORECASE)
+SHARE_PATTERN = re.compile(r"(\d{1,3})\s*%\s*(?:of\s+\w+\s+)?(?:as\s+|are\s+|were\s+|being\s+)?bungalows", re.IGNORECASE)
+
+
+def params_from_question(question):
+    """
+    ScenarioParams for a what-if question, or None if the question isn't one.
+    Recognises "all bungalows", "N% bungalows", "N homes/units" and "over N years" phrasing.
+    A bungalow share applies to the development when the question gives a number of homes or talks
+    about a development; without a number of homes that changes nothing, as its size is unknown.
+    Otherwise the share applies to all new supply in the region ("what if all new homes were bungalows").
+    A what-if that changes nothing gives None; only an explicit request to simulate gives the baseline
+    """
+    if not WHAT_IF_PATTERN.search(question):
+        return None
+
+    overrides = {}
+    units = UNITS_PATTERN.search(question)
+    if units:
+        overrides["development_units"] = int(units.group(1).replace(",", ""))
+        years = DEVELOPMENT_YEARS_PATTERN.search(question)
+        if years and int(years.group(1)) > 0:
+            overrides["development_years"] = int(years.group(1))
+    share = SHARE_PATTERN.search(question)
+    if ALL_BUNGALOWS_PATTERN.search(question):
+        share_value = 1.0
+    elif share:
+        share_value = min(int(share.group(1)), 100) / 100
+    else:
+        share_value = None
+    if share_value is not None:
+        if units:
+            overrides["development_bungalow_share"] = share_value
+        elif not DEVELOPMENT_PATTERN.search(question):
+            overrides["bungalow_share"] = share_value
+    params = ScenarioParams(**overrides)
+    if params == ScenarioParams() and not BASELINE_PATTERN.search(question):
+        return None
+    return params
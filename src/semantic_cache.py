@@ -0,0 +1,212 @@
+"""
+Semantic answer cache: finds earlier answers to differently-worded versions of the same question.
+
+Questions are embedded into unit vectors kept in one NumPy matrix; a lookup is a single
+matrix-vector product (cosine similarity) against every live entry. A hit needs similarity at or
+above threshold and the same guard terms in both questions (question_guard: numbers, place names and
+words such as "not", "over" or "under"), so "shortfall in 2027" never answers "shortfall in 2028" or
+"shortfall in 2027 in Durham". Entries expire after max_age seconds; when the cache is full the
+oldest entry is replaced.
+
+Embedders are callables taking a string and returning a 1-D vector. HashingEmbedder is local and
+deterministic (for offline use and tests); TitanEmbedder calls Amazon Titan Text Embeddings on Bedrock.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+
+import numpy as np
+
+from aws_clients import get_client
+from response_cache import normalise_prompt
+
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*')
+WORD_PATTERN = re.compile(r'[a-z]+')
+# Capitalised words; those not opening a sentence are taken to be place names
+CAPITALISED_PATTERN = re.compile(r"\b[A-Z][A-Za-z'-]+")
+SENTENCE_START_PATTERN = re.compile(r"(?:^|[.?!:;])\s*$")
+GUARD_WORD_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# Negations, comparisons and directions: questions differing only in one of these ask opposite things
+GUARD_WORDS = frozenset(
+    'no not never none without except excluding over under above below more less fewer most least '
+    'increase decrease rise fall before after older younger'.split()
+)
+
+# Words that carry no meaning for matching questions
+STOP_WORDS = frozenset(
+    'a an and are as at be by can do does for from how i in is it me many much of on or please show tell '
+    'that the there this to was we what when where which will with would you'.split()
+)
+
+
+# Housing-domain synonyms mapped to one canonical word, so paraphrases share features
+SYNONYMS = {
+    'short': 'shortfall', 'shortage': 'shortfall', 'gap': 'shortfall', 'deficit': 'shortfall', 'shortfalls': 'shortfall',
+    'need': 'demand', 'needed': 'demand', 'required': 'demand', 'requirement': 'demand',
+    'supplied': 'supply', 'built': 'supply', 'delivered': 'supply', 'delivery': 'supply', 'completions': 'supply',
+    'homes': 'house', 'houses': 'house', 'dwellings': 'house', 'dwelling': 'house', 'housing': 'house',
+    'units': 'house', 'people': 'population', 'residents': 'population', 'migrants': 'migration',
+}
+
+
+def _canonical(word):
+    word = SYNONYMS.get(word, word)
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        word = SYNONYMS.get(word[:-1], word[:-1])
+    return word
+
+
+def question_numbers(question):
+    """
+    Numbers in a question (thousands separators removed); cached answers must match them exactly
+    """
+    return frozenset(n.replace(',', '') for n in NUMBER_PATTERN.findall(question))
+
+
+def question_places(question):
+    """
+    Capitalised words that don't open a sentence, lower-cased: "...in 2027 in Durham?" -> {"durham"}
+    """
+    return frozenset(
+        match.group().lower() for match in CAPITALISED_PATTERN.finditer(question)
+        if not SENTENCE_START_PATTERN.search(question[:match.start()])
+    )
+
+
+def question_guard(question):
+    """
+    Terms two questions must share exactly for one's answer to serve the other:
+    numbers, place names and negation/comparison words ("isn't" counts as "not")
+    """
+    words = {'not' if word.endswith("n't") else word for word in GUARD_WORD_PATTERN.findall(question.lower())}
+    return (question_numbers(question) | question_places(question)
+            | frozenset('w:' + word for word in words & GUARD_WORDS))
+
+
+class HashingEmbedder:
+    """
+    Deterministic bag-of-features embedding: words (singularised, with housing synonyms folded together)
+    and their character n-grams, hashed into dim buckets
+    """
+
+    def __init__(self, dim=1024, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def _features(self, text):
+        words = [_canonical(w) for w in WORD_PATTERN.findall(normalise_prompt(text)) if w not in STOP_WORDS]
+        for word in words:
+            yield 'w:' + word, 1.0
+            # Character n-grams give a little credit to words sharing a stem that the synonym table misses
+            padded = f'<{word}>'
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                for i in range(len(padded) - n + 1):
+                    yield 'g:' + padded[i:i + n], 0.15
+        for number in question_numbers(text):
+            yield 'n:' + number, 1.0
+
+    def __call__(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dim
+            vector[bucket] += weight if digest[4] & 1 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class TitanEmbedder:
+    """
+    Amazon Titan Text Embeddings V2 on Bedrock, returning normalised vectors of the given size
+    """
+
+    def __init__(self, model_id='amazon.titan-embed-text-v2:0', dimensions=512, client=None):
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.client = client
+
+    def __call__(self, text):
+        response = (self.client or get_client('bedrock-runtime', region_name='us-west-2')).invoke_model(
+            modelId=self.model_id,
+            contentType='application/json',
+            accept='application/json',
+            body=json.dumps({'inputText': text, 'dimensions': self.dimensions, 'normalize': True})
+        )
+        return np.asarray(json.loads(response['body'].read())['embedding'], dtype=np.float32)
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour answer cache over question embeddings.
+
+    Args:
+        embedder (callable, optional): str -> 1-D vector. Defaults to HashingEmbedder().
+        threshold (float, optional): Minimum cosine similarity for a hit. Defaults to 0.9.
+        capacity (int, optional): Most entries kept. Defaults to 2000.
+        max_age (float, optional): Seconds an entry stays valid. Defaults to 24 hours.
+    """
+
+    def __init__(self, embedder=None, threshold=0.9, capacity=2000, max_age=24 * 60 * 60, clock=time.time):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.capacity = capacity
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._created = np.full(capacity, -np.inf)
+        self._entries = [None] * capacity
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __len__(self):
+        return sum(entry is not None for entry in self._entries)
+
+    def _embed(self, question):
+        vector = np.asarray(self.embedder(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, question, scope=None):
+        """
+        The cached answer to the most similar earlier question in scope, or None
+        """
+        vector = self._embed(question)
+        guard = question_guard(question)
+        with self._lock:
+            if self._vectors is not None:
+                similarity = self._vectors @ vector
+                similarity[self._created < self.clock() - self.max_age] = -np.inf
+                candidates = np.flatnonzero(similarity >= self.threshold)
+                for index in candidates[np.argsort(similarity[candidates])[::-1]]:
+                    entry_scope, entry_guard, answer = self._entries[index]
+                    if entry_scope == scope and entry_guard == guard:
+                        self.stats['hits'] += 1
+                        return answer
+            self.stats['misses'] += 1
+            return None
+
+    def add(self, question, answer, scope=None):
+        vector = self._embed(question)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+            # An empty or expired slot has the smallest creation time, so this also evicts the oldest entry
+            slot = int(np.argmin(self._created))
+            self._vectors[slot] = vector
+            self._created[slot] = self.clock()
+            self._entries[slot] = (scope, question_guard(question), answer)
+
+    def invalidate(self, scope=None):
+        """
+        Drop every entry in a scope, or all entries if no scope is given
+        """
+        with self._lock:
+            for slot, entry in enumerate(self._entries):
+                if entry is not None and (scope is None or entry[0] == scope):
+                    self._entries[slot] = None
+                    self._created[slot] = -np.inf
+                    if self._vectors is not None:
+                        self._vectors[slot] = 0
@@ -0,0 +1,207 @@
+"""
+Lightweight per-stage tracing: timing spans with attributes (token counts, cache hits), emitted
+as structured JSON log lines and aggregated in-process into latency histograms.
+
+Enabled by setting PREDICTIVE_PLANNING_TRACE=1 (or calling enable()). When disabled, span()
+returns a shared no-op object, so instrumented code pays one global lookup per span.
+
+    with tracing.span('create_excel', rows=len(forecast)) as s:
+        ...
+        s.set(cache_hit=False)
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('predictive_planning.trace')
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+_enabled = os.environ.get('PREDICTIVE_PLANNING_TRACE', '').lower() in ('1', 'true', 'yes')
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+def enable(flag=True):
+    """
+    Turn tracing on or off. Span lines are logged at INFO whatever the root logger's level;
+    a stderr handler is added only if nothing else would print them
+    """
+    global _enabled
+    _enabled = flag
+    if flag:
+        logger.setLevel(logging.INFO)
+        if not logger.handlers and not logging.getLogger().handlers:
+            logger.addHandler(logging.StreamHandler())
+
+
+def is_enabled():
+    return _enabled
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'start')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        observe(self.name, duration)
+        with _lock:
+            for key, value in self.attrs.items():
+                if key.endswith('_tokens') and isinstance(value, int):
+                    _add(f'{self.name}.{key}', value)
+                elif key == 'cache_hit':
+                    _add(f'{self.name}.cache_hits' if value else f'{self.name}.cache_misses', 1)
+            if 'error' in self.attrs:
+                _add(f'{self.name}.errors', 1)
+        logger.info(json.dumps({'span': self.name, 'duration': round(duration, 6), **self.attrs}, default=str))
+        return False
+
+
+def span(name, **attrs):
+    """
+    Time a block as a named stage. Returns a no-op when tracing is disabled
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def _add(name, value):
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name, seconds):
+    """
+    Record a duration in the named histogram
+    """
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS)}
+        histogram['count'] += 1
+        histogram['sum'] += seconds
+        histogram['buckets'][bisect_left(BUCKETS, seconds)] += 1
+
+
+def metrics():
+    """
+    Snapshot of all histograms (bucket counts are cumulative, keyed by upper bound) and counters
+    """
+    with _lock:
+        histograms = {}
+        for name, h in _histograms.items():
+            cumulative, running = {}, 0
+            for bound, count in zip(BUCKETS, h['buckets']):
+                running += count
+                cumulative['+Inf' if bound == math.inf else str(bound)] = running
+            histograms[name] = {'count': h['count'], 'sum': h['sum'], 'buckets': cumulative}
+        return {'histograms': histograms, 'counters': dict(_counters)}
+
+
+def dump_metrics(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics(), f, indent=2)
+
+
+def _metric_name(name):
+    return 'predictive_planning_' + ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def prometheus_text():
+    """
+    Metrics in the Prometheus text exposition format, for scraping
+    """
+    snapshot = metrics()
+    lines = []
+    for name, h in snapshot['histograms'].items():
+        metric = _metric_name(name) + '_seconds'
+        lines.append(f'# TYPE {metric} histogram')
+        for bound, count in h['buckets'].items():
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+        lines.append(f'{metric}_sum {h["sum"]}')
+        lines.append(f'{metric}_count {h["count"]}')
+    for name, value in snapshot['counters'].items():
+        metric = _metric_name(name) + '_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/metrics.json'):
+            body, content_type = json.dumps(metrics()).encode('utf-8'), 'application/json'
+        else:
+            body, content_type = prometheus_text().encode('utf-8'), 'text/plain; version=0.0.4'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a background thread. Idempotent
+    """
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+if _enabled:
+    enable()
@@ -0,0 +1,11 @@
+import os
+import sys
+from pathlib import Path
+
+# Tests must never read or write the app's on-disk response cache
+os.environ["BEDROCK_CACHE_PATH"] = ":memory:"
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT / "src", ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,74 @@
+import threading
+
+from agent_sessions import AgentSessionPool
+from bedrock_integration import stream_with_knowledge_base
+from fakes import FakeAgentRuntime
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_each_user_keeps_one_session():
+    pool = AgentSessionPool(prefix="TEST")
+    first = pool.session_id("alice")
+    assert first.startswith("TEST-")
+    assert pool.session_id("alice") == first
+    assert pool.session_id("bob") != first
+    pool.end("alice")
+    assert pool.session_id("alice") != first
+
+
+def test_idle_sessions_are_evicted_but_busy_ones_are_kept():
+    clock = Clock()
+    pool = AgentSessionPool(idle_timeout=100, clock=clock)
+    idle = pool.session_id("idle")
+    clock.now = 50
+    recent = pool.session_id("recent")
+
+    with pool.acquire("busy") as busy:
+        # "busy" was last used at 50, like "recent", but is still mid-turn
+        clock.now = 200
+        pool.evict_idle()
+        assert len(pool) == 1
+    assert pool.session_id("busy") == busy
+    assert pool.session_id("idle") != idle
+    assert pool.session_id("recent") != recent
+
+
+def test_sweep_runs_on_use():
+    clock = Clock()
+    pool = AgentSessionPool(idle_timeout=100, clock=clock)
+    pool.session_id("old")
+    clock.now = 200
+    pool.session_id("new")
+    assert len(pool) == 1
+
+
+def test_stream_uses_the_users_session_and_serialises_their_turns():
+    agent = FakeAgentRuntime(latency=0.02, jitter=0, reply="An answer.")
+    calls = []
+
+    def answer_stream(query, session_id, **kwargs):
+        calls.append(session_id)
+        return stream_with_knowledge_base(query, session_id=session_id, **kwargs)
+
+    pool = AgentSessionPool()
+    results = {}
+
+    def ask(user, i):
+        results[user, i] = "".join(pool.stream(user, f"q{i}", answer_stream, client=agent, use_cache=False))
+
+    threads = [threading.Thread(target=ask, args=(user, i)) for user in ("alice", "bob") for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(results.values()) == {"An answer."}
+    assert set(calls) == {pool.session_id("alice"), pool.session_id("bob")}
+    assert agent.throttled == 0
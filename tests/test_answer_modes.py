@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import bedrock_integration
+from answer_modes import AGENT, FAST, choose_mode, routed_stream
+from bedrock_integration import retrieve_passages, stream_fast_answer
+from fakes import FakeAgentRuntime, FakeBedrockRuntime
+
+
+class RecordingRuntime(FakeBedrockRuntime):
+    def __init__(self, **kwargs):
+        super().__init__(latency=0, jitter=0, **kwargs)
+        self.bodies = []
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        self.bodies.append(json.loads(kwargs['body']))
+        return super().invoke_model_with_response_stream(**kwargs)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    bedrock_integration.response_cache.invalidate()
+    yield
+    bedrock_integration.response_cache.invalidate()
+
+
+@pytest.mark.parametrize("question, mode", [
+    ("What is the bungalow shortfall in Durham in 2027?", FAST),
+    ("What if this development was all bungalows?", AGENT),
+    ("Should Durham prioritise bungalows over flats?", AGENT),
+    ("How many bungalows are needed? And how many are planned?", AGENT),
+    (" ".join(["word"] * 30), AGENT),
+])
+def test_choose_mode_on_the_first_turn(question, mode):
+    assert choose_mode(question) == mode
+
+
+@pytest.mark.parametrize("question, mode", [
+    ("and in 2028?", AGENT),
+    ("What about Sunderland?", AGENT),
+    ("Is it higher than the national average?", AGENT),
+    ("How many?", AGENT),
+    ("What is the bungalow shortfall in Sunderland in 2027?", FAST),
+])
+def test_choose_mode_sends_follow_ups_to_the_agent(question, mode):
+    assert choose_mode(question, first_turn=False) == mode
+
+
+def test_routed_stream_uses_first_turn():
+    def fast(question, **kwargs):
+        yield FAST
+
+    def agent(question, **kwargs):
+        yield AGENT
+
+    assert list(routed_stream("and in 2028?", agent_stream=agent, fast_stream=fast)) == [FAST]
+    assert list(routed_stream("and in 2028?", agent_stream=agent, fast_stream=fast, first_turn=False)) == [AGENT]
+
+
+def test_retrieve_passages_parses_and_caches_results():
+    client = FakeAgentRuntime(latency=0, jitter=0, retrieve_latency=0)
+
+    passages = retrieve_passages("bungalow demand", number_of_results=3, client=client)
+
+    assert [p["source"] for p in passages] == [f"s3://fake-kb/doc-{i}.pdf" for i in range(3)]
+    assert [p["score"] for p in passages] == [1.0, 0.9, 0.8]
+    assert "bungalow demand" in passages[0]["text"]
+    assert retrieve_passages("bungalow demand", number_of_results=3, client=client) == passages
+    assert client.calls == 1
+    # A different result count is a different query
+    assert len(retrieve_passages("bungalow demand", number_of_results=2, client=client)) == 2
+    assert client.calls == 2
+
+
+def test_retrieve_passages_without_cache_always_retrieves():
+    client = FakeAgentRuntime(latency=0, jitter=0, retrieve_latency=0)
+
+    retrieve_passages("bungalow demand", use_cache=False, client=client)
+    retrieve_passages("bungalow demand", use_cache=False, client=client)
+    assert client.calls == 2
+    retrieve_passages("bungalow demand", client=client)
+    assert client.calls == 3
+
+
+def test_stream_fast_answer_grounds_the_prompt_on_passages():
+    client = RecordingRuntime(reply="Durham is short of bungalows.")
+    agent_client = FakeAgentRuntime(latency=0, jitter=0, retrieve_latency=0)
+
+    answer = "".join(stream_fast_answer("bungalow gap in Durham", client=client, agent_client=agent_client,
+                                        number_of_results=2, instructions="\nReply in one line."))
+
+    assert answer == "Durham is short of bungalows."
+    [body] = client.bodies
+    prompt = body["messages"][0]["content"][0]["text"]
+    assert prompt.count("<passage source=") == 2
+    assert 'source="s3://fake-kb/doc-1.pdf"' in prompt
+    assert "Question: bungalow gap in Durham" in prompt
+    assert prompt.endswith("\nReply in one line.")
+    assert agent_client.calls == 1
@@ -0,0 +1,58 @@
+import json
+
+from batch_export import output_filename, run_batch
+from excel_helper import FORECAST_JSON
+
+
+def test_output_filename_numbers_taken_names(tmp_path):
+    first = output_filename("St. Albans", str(tmp_path))
+    assert first == str(tmp_path / "St_Albans_housing_forecast.xlsx")
+    assert output_filename("St Albans", str(tmp_path), taken={first}) == str(tmp_path / "St_Albans_housing_forecast_2.xlsx")
+
+
+def test_run_batch_keeps_regions_with_colliding_names(tmp_path):
+    source = tmp_path / "forecasts.jsonl"
+    forecast = FORECAST_JSON["forecast"][:2]
+    source.write_text("\n".join(json.dumps({"region": region, "forecast": forecast})
+                                for region in ("St. Albans", "St Albans", "Durham")))
+    output_dir = tmp_path / "out"
+
+    results, failures = run_batch(str(source), str(output_dir), workers=2)
+
+    assert failures == []
+    assert {region: filename for region, filename, _, _ in results} == {
+        "St. Albans": str(output_dir / "St_Albans_housing_forecast.xlsx"),
+        "St Albans": str(output_dir / "St_Albans_housing_forecast_2.xlsx"),
+        "Durham": str(output_dir / "Durham_housing_forecast.xlsx"),
+    }
+    assert sorted(p.name for p in output_dir.iterdir()) == [
+        "Durham_housing_forecast.xlsx", "St_Albans_housing_forecast.xlsx", "St_Albans_housing_forecast_2.xlsx",
+    ]
+
+
+def test_unwritable_output_fails_only_that_region(tmp_path):
+    source = tmp_path / "forecasts.jsonl"
+    forecast = FORECAST_JSON["forecast"][:2]
+    source.write_text("\n".join(json.dumps({"region": region, "forecast": forecast}) for region in ("Bath", "Durham")))
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    (output_dir / "Bath").write_text("a file where the region's directory should go")
+
+    results, failures = run_batch(str(source), str(output_dir), workers=1, filename_pattern="{region}/forecast.xlsx")
+
+    assert [region for region, _, _, _ in results] == ["Durham"]
+    assert (output_dir / "Durham" / "forecast.xlsx").exists()
+    assert [label for label, _ in failures] == ["line 1"]
+    assert not list(output_dir.glob(".partial-*"))
+
+
+def test_failed_region_leaves_no_partial_file(tmp_path):
+    source = tmp_path / "forecasts.jsonl"
+    source.write_text('{"region": "Bath", "forecast": []}\n{"region": "Durham"}\n')
+    output_dir = tmp_path / "out"
+
+    results, failures = run_batch(str(source), str(output_dir), workers=1)
+
+    assert results == []
+    assert len(failures) == 2
+    assert list(output_dir.iterdir()) == []
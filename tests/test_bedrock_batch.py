@@ -0,0 +1,104 @@
+import functools
+import threading
+import time
+
+import requests
+
+from bedrock_batch import AdaptiveLimiter, is_throttling_error, run_prompts
+from bedrock_integration import generate_text
+from fakes import FakeBedrockRuntime, throttling_error
+
+
+def test_results_come_back_in_input_order():
+    def call(prompt):
+        # Later prompts finish first
+        time.sleep(0.002 * (10 - int(prompt)))
+        return f"answer {prompt}"
+
+    results = run_prompts([str(i) for i in range(10)], call=call, max_concurrency=4)
+    assert [r.prompt for r in results] == [str(i) for i in range(10)]
+    assert [r.text for r in results] == [f"answer {i}" for i in range(10)]
+    assert all(r.error is None and r.attempts == 1 for r in results)
+
+
+def test_throttled_calls_are_retried_until_they_succeed():
+    client = FakeBedrockRuntime(latency=0.01, jitter=0, capacity=2, seed=0)
+    call = functools.partial(generate_text, client=client, use_cache=False)
+
+    results = run_prompts([f"question {i}" for i in range(12)], call=call, max_concurrency=6, max_attempts=20,
+                          base_delay=0.001, max_delay=0.01)
+
+    assert all(r.text == "Fake answer." for r in results)
+    assert client.throttled > 0
+    assert sum(r.attempts for r in results) == 12 + client.throttled
+
+
+def test_other_errors_and_exhausted_retries_are_reported():
+    def call(prompt):
+        if prompt == "bad":
+            raise ValueError("malformed")
+        raise throttling_error("InvokeModel")
+
+    bad, throttled = run_prompts(["bad", "busy"], call=call, max_attempts=3, base_delay=0.001)
+    assert (bad.text, bad.error, bad.attempts) == (None, "ValueError: malformed", 1)
+    assert throttled.attempts == 3
+    assert "ThrottlingException" in throttled.error
+
+
+def test_limiter_halves_on_throttle_and_recovers_one_step_per_window():
+    limiter = AdaptiveLimiter(8)
+    for expected in (4, 2, 1, 1):
+        limiter.acquire()
+        limiter.release(throttled=True)
+        assert limiter.limit == expected
+
+    for expected in (2, 3):
+        for _ in range(8):
+            limiter.acquire()
+            limiter.release()
+        assert limiter.limit == expected
+
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 8
+
+
+def test_limiter_blocks_callers_over_the_limit():
+    limiter = AdaptiveLimiter(2)
+    limiter.acquire()
+    limiter.acquire()
+    limiter.release(throttled=True)  # limit 1 with one still in flight
+    acquired = threading.Event()
+
+    def waiter():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    assert not acquired.wait(0.05)
+    limiter.release()
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_non_boto_errors_are_reported_per_prompt():
+    def call(prompt):
+        if prompt == "bad":
+            raise requests.HTTPError("502 Server Error", response=None)
+        return "ok"
+
+    results = run_prompts(["bad", "good", "bad"], call=call, max_concurrency=1)
+    assert [r.text for r in results] == [None, "ok", None]
+    assert results[0].error == "HTTPError: 502 Server Error"
+    assert results[0].attempts == 1
+
+
+def test_is_throttling_error_ignores_foreign_response_attributes():
+    class WithResponseObject(Exception):
+        response = object()
+
+    assert is_throttling_error(throttling_error("InvokeModel"))
+    assert not is_throttling_error(WithResponseObject())
+    assert not is_throttling_error(ValueError())
@@ -0,0 +1,74 @@
+import pytest
+
+from chat_history import FILE, ChatMessage, MessagePart, render_history
+from fakes import FakeStreamlit
+
+
+class RecordingStreamlit(FakeStreamlit):
+    """
+    Records written text, download keys and button labels; the button reports a press if pressed is set
+    """
+
+    def __init__(self, pressed=False):
+        super().__init__()
+        self.pressed = pressed
+        self.written = []
+        self.keys = []
+        self.buttons = []
+        self.reruns = 0
+
+    def write(self, text):
+        self.written.append(text)
+
+    def download_button(self, **kwargs):
+        self.keys.append(kwargs['key'])
+
+    def button(self, label, *args, **kwargs):
+        self.buttons.append(label)
+        return self.pressed
+
+    def rerun(self):
+        self.reruns += 1
+
+
+MESSAGES = [ChatMessage.text('user' if i % 2 else 'assistant', f'message {i}') for i in range(7)]
+
+
+def test_short_history_is_rendered_in_full():
+    ui = RecordingStreamlit()
+    render_history(MESSAGES, ui, {}, page_size=10)
+    assert ui.written == [f'message {i}' for i in range(7)]
+    assert ui.buttons == []
+
+
+def test_long_history_renders_the_last_page_behind_a_button():
+    ui = RecordingStreamlit()
+    state = {}
+    render_history(MESSAGES, ui, state, page_size=3)
+    assert ui.written == ['message 4', 'message 5', 'message 6']
+    assert ui.buttons == ['Show earlier messages (4 hidden)']
+    assert state == {} and ui.reruns == 0
+
+
+@pytest.mark.parametrize("pages, shown, hidden", [(2, 6, 1), (3, 7, 0)])
+def test_each_requested_page_shows_more(pages, shown, hidden):
+    ui = RecordingStreamlit()
+    render_history(MESSAGES, ui, {'history_pages': pages}, page_size=3)
+    assert ui.written == [f'message {i}' for i in range(7 - shown, 7)]
+    assert ui.buttons == ([f'Show earlier messages ({hidden} hidden)'] if hidden else [])
+
+
+def test_pressing_the_button_asks_for_another_page():
+    ui = RecordingStreamlit(pressed=True)
+    state = {'history_pages': 1}
+    render_history(MESSAGES, ui, state, page_size=3)
+    assert state['history_pages'] == 2
+    assert ui.reruns == 1
+
+
+def test_widget_keys_follow_the_message_position():
+    messages = MESSAGES + [ChatMessage('assistant', [MessagePart(FILE, b'xlsx', file_name='forecast.xlsx')])]
+    ui = RecordingStreamlit()
+    render_history(messages, ui, {}, page_size=3)
+    render_history(messages, ui, {'history_pages': 3}, page_size=3)
+    assert ui.keys == ['message-7-0', 'message-7-0']
@@ -0,0 +1,84 @@
+import json
+import time
+
+import tracing
+from answer_modes import routed_stream
+from chat_history import CHART, ERROR, TEXT
+from chat_turn import run_turn
+from excel_helper import FORECAST_JSON
+from fakes import FakeStreamlit
+
+RECORDS = FORECAST_JSON["forecast"][:2]
+
+
+def _fake_answer(calls, reply):
+    def answer_stream(question, **kwargs):
+        calls.append((question, kwargs))
+        yield from (reply[i:i + 8] for i in range(0, len(reply), 8))
+    return answer_stream
+
+
+def test_model_forecast_sends_instructions_separately_and_hides_the_json():
+    calls = []
+    reply = "Demand outpaces supply.\n" + json.dumps({"region": "Durham", "forecast": RECORDS})
+    messages = []
+
+    run_turn("What is the bungalow gap?", FakeStreamlit(), messages, answer_stream=_fake_answer(calls, reply),
+             model_forecast=True)
+
+    [(question, kwargs)] = calls
+    assert question == "What is the bungalow gap?"
+    assert '"forecast"' in kwargs["instructions"]
+    answer = messages[1]
+    assert answer.parts[0].kind == TEXT
+    assert answer.parts[0].payload == "Demand outpaces supply.\n"
+    table = messages[2].parts[1].payload
+    assert list(table["Year"]) == [record["year"] for record in RECORDS]
+
+
+def test_routing_only_sees_the_question():
+    calls = []
+    stream = routed_stream("Bungalow gap in 2027?", agent_stream=_fake_answer(calls, "agent"),
+                           fast_stream=_fake_answer(calls, "fast"), instructions="compare " * 40)
+    assert "".join(stream) == "fast"
+    assert calls == [("Bungalow gap in 2027?", {"instructions": "compare " * 40})]
+
+
+def test_export_failure_is_shown_as_an_error_part():
+    messages = []
+    response = run_turn("What is the bungalow gap?", FakeStreamlit(), messages,
+                        answer_stream=_fake_answer([], "An answer."), forecast=[])
+    assert response.text == "An answer."
+    [part] = messages[-1].parts
+    assert part.kind == ERROR
+    assert "Forecast has no records" in part.payload
+
+
+def test_routed_answer_is_timed_until_its_last_chunk():
+    def slow_fast_stream(question):
+        yield "a"
+        time.sleep(0.05)
+        yield "b"
+
+    tracing.reset()
+    tracing.enable()
+    try:
+        assert "".join(routed_stream("Bungalow gap?", fast_stream=slow_fast_stream)) == "ab"
+        histogram = tracing.metrics()["histograms"]["answer.fast"]
+    finally:
+        tracing.enable(False)
+        tracing.reset()
+    assert histogram["count"] == 1
+    assert histogram["sum"] >= 0.05
+
+
+def test_scenario_chart_is_labelled_by_whether_anything_changed():
+    def chart_titles(prompt):
+        messages = []
+        run_turn(prompt, FakeStreamlit(), messages, answer_stream=_fake_answer([], "An answer."),
+                 forecast=RECORDS)
+        return [part.title for part in messages[-1].parts if part.kind == CHART]
+
+    assert chart_titles("What if this development was all bungalows?") == ["Line Chart"]
+    assert chart_titles("Simulate the bungalow gap")[1].startswith("Baseline Bungalow Gap Bands")
+    assert chart_titles("What if we built 500 homes?")[1].startswith("Bungalow Gap Scenario Bands")
@@ -0,0 +1,102 @@
+import copy
+from io import BytesIO
+
+import pytest
+from openpyxl import load_workbook
+
+import excel_helper
+from excel_helper import FORECAST_JSON, create_excel_bytes, stream_excel
+from forecast_table import forecast_table
+from scenarios import ScenarioParams, run_scenarios
+
+RECORDS = FORECAST_JSON["forecast"]
+
+
+@pytest.fixture(autouse=True)
+def empty_memo():
+    excel_helper._EXCEL_CACHE.clear()
+    yield
+    excel_helper._EXCEL_CACHE.clear()
+
+
+def test_workbook_bytes_hold_the_summary():
+    excel_data, df = create_excel_bytes(RECORDS)
+
+    wb = load_workbook(BytesIO(excel_data))
+    assert "Forecast Summary" in wb.sheetnames and "Scenario Bands" not in wb.sheetnames
+    assert list(df["Year"]) == [record["year"] for record in RECORDS]
+    assert wb["Forecast Summary"]["A2"].value == RECORDS[0]["year"]
+
+
+def test_unchanged_forecast_is_rendered_once():
+    first, _ = create_excel_bytes(RECORDS)
+    second, _ = create_excel_bytes(copy.deepcopy(RECORDS))
+    assert second is first
+    assert len(excel_helper._EXCEL_CACHE) == 1
+
+
+def test_equal_arrow_tables_share_a_workbook():
+    first, _ = create_excel_bytes(forecast_table(RECORDS))
+    assert create_excel_bytes(forecast_table(RECORDS))[0] is first
+
+
+def test_changed_forecast_or_bands_render_again():
+    first, _ = create_excel_bytes(RECORDS)
+    changed = copy.deepcopy(RECORDS)
+    changed[0]["bungalow_supply"] += 1
+    assert create_excel_bytes(changed)[0] is not first
+
+    bands = run_scenarios(RECORDS, ScenarioParams(n_sims=100))
+    with_bands, _ = create_excel_bytes(RECORDS, bands)
+    assert with_bands is not first
+    assert "Scenario Bands" in load_workbook(BytesIO(with_bands)).sheetnames
+    assert len(excel_helper._EXCEL_CACHE) == 3
+
+
+def test_callers_get_their_own_summary_copy():
+    _, df = create_excel_bytes(RECORDS)
+    df["Year"] = 0
+    _, again = create_excel_bytes(RECORDS)
+    assert list(again["Year"]) == [record["year"] for record in RECORDS]
+
+
+def test_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(excel_helper, "_EXCEL_CACHE_SIZE", 2)
+    for year in range(3):
+        records = copy.deepcopy(RECORDS)
+        records[0]["year"] -= year + 1
+        create_excel_bytes(records)
+    assert len(excel_helper._EXCEL_CACHE) == 2
+
+
+@pytest.mark.parametrize("chunk_size", [2, 5000])
+def test_stream_excel_writes_every_record(tmp_path, chunk_size):
+    filename = tmp_path / "forecast.xlsx"
+    assert stream_excel(RECORDS, filename, chunk_size=chunk_size) == len(RECORDS)
+
+    wb = load_workbook(filename)
+    assert wb.sheetnames == ["Forecast Summary", "Population Makeup", "Age Distribution"]
+    summary = list(wb["Forecast Summary"].values)
+    assert [row[0] for row in summary[1:]] == [record["year"] for record in RECORDS]
+    makeup = list(wb["Population Makeup"].values)
+    assert makeup[0][0] == "Year" and len(makeup) == len(RECORDS) + 1
+    ages = list(wb["Age Distribution"].values)
+    assert ages[0] == ("Age Group", "Population")
+    assert dict(ages[1:]) == RECORDS[0]["population_makeup"]["age_distribution"]
+
+
+def test_stream_excel_matches_create_excel_bytes_summary(tmp_path):
+    filename = tmp_path / "forecast.xlsx"
+    stream_excel(forecast_table(RECORDS), filename)
+    _, df = create_excel_bytes(RECORDS)
+
+    rows = list(load_workbook(filename)["Forecast Summary"].values)
+    assert list(rows[0]) == list(df.columns)
+    assert [list(row) for row in rows[1:]] == df.values.tolist()
+
+
+def test_stream_excel_rejects_an_empty_forecast(tmp_path):
+    filename = tmp_path / "forecast.xlsx"
+    with pytest.raises(ValueError, match="Forecast has no records"):
+        stream_excel([], filename)
+    assert not filename.exists()
@@ -0,0 +1,36 @@
+import pytest
+
+from excel_helper import FORECAST_JSON, extract_forecast
+from forecast_store import ForecastStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ForecastStore(str(tmp_path / "store"))
+    store.write("Durham", FORECAST_JSON["forecast"])
+    store.write("Bath", FORECAST_JSON["forecast"][:2], scenario="high")
+    return store
+
+
+def test_load_slices_by_region_scenario_and_years(store):
+    years = [record["year"] for record in FORECAST_JSON["forecast"]]
+    assert store.regions() == ["Bath", "Durham"]
+    assert store.scenarios("Bath") == ["high"]
+    assert store.load("Durham")["year"].to_pylist() == years
+    assert store.load("Durham", years=(years[1], years[2]))["year"].to_pylist() == years[1:3]
+    assert store.load("Bath").num_rows == 0
+    assert store.load("Bath", "high").num_rows == 2
+
+
+def test_extract_forecast_reads_the_requested_region(store):
+    assert extract_forecast("Bath", "high", store=store).num_rows == 2
+
+
+def test_extract_forecast_falls_back_to_inline_forecast_without_a_region(store):
+    assert FORECAST_JSON["region"] not in store.regions()
+    assert extract_forecast(store=store) is FORECAST_JSON["forecast"]
+
+
+def test_extract_forecast_rejects_unknown_region(store):
+    with pytest.raises(ValueError, match="No baseline forecast for Leeds"):
+        extract_forecast("Leeds", store=store)
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from excel_helper import FORECAST_JSON
+from forecast_stream import ForecastStreamParser, iter_forecast_records, strip_forecast_json
+
+RECORDS = FORECAST_JSON["forecast"][:3]
+REPLY = (
+    "The gap widens every year.\n\n```json\n"
+    + json.dumps({"region": "Durham \"North\" {east}", "forecast": RECORDS})
+    + "\n```\nThat is my forecast."
+)
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, len(REPLY)])
+def test_parser_returns_each_record_once_whatever_the_chunking(size):
+    parser = ForecastStreamParser()
+    completed = [record for chunk in _chunks(REPLY, size) for record in parser.feed(chunk)]
+    assert completed == RECORDS
+    assert parser.records == RECORDS
+    assert parser.errors == []
+    assert parser.done
+
+
+def test_parser_handles_braces_quotes_and_escapes_inside_strings():
+    record = dict(RECORDS[0], note='a "quoted" {brace} \\ and ] bracket')
+    reply = json.dumps({"forecast": [record]})
+    parser = ForecastStreamParser()
+    for chunk in _chunks(reply, 3):
+        parser.feed(chunk)
+    # The extra "note" property is allowed by the schema
+    assert parser.records == [record]
+
+
+def test_parser_skips_invalid_records_and_keeps_going():
+    bad_type = dict(RECORDS[0], population="lots")
+    missing = {key: value for key, value in RECORDS[1].items() if key != "housing_stock"}
+    reply = '{"forecast": [' + ", ".join([json.dumps(bad_type), '{"year": 2030,}', json.dumps(missing),
+                                          json.dumps(RECORDS[2])]) + "]}"
+    parser = ForecastStreamParser()
+    completed = [record for chunk in _chunks(reply, 5) for record in parser.feed(chunk)]
+    assert completed == [RECORDS[2]]
+    assert len(parser.errors) == 3
+    assert parser.errors[0].startswith("record 1: population")
+    assert parser.errors[2].startswith("record 3: ")
+
+
+def test_parser_finds_forecast_key_split_across_chunks_and_ignores_text_after_array():
+    parser = ForecastStreamParser()
+    assert parser.feed('{"fore') == []
+    assert parser.feed('cast": [' + json.dumps(RECORDS[0])) == [RECORDS[0]]
+    assert parser.feed('], "forecast": [' + json.dumps(RECORDS[1])) == []
+    assert parser.done
+
+
+def test_iter_forecast_records():
+    assert list(iter_forecast_records(_chunks(REPLY, 11))) == RECORDS
+
+
+@pytest.mark.parametrize("size", [1, 3, 64, len(REPLY)])
+def test_strip_forecast_json_keeps_only_prose_before_the_json(size):
+    assert "".join(strip_forecast_json(_chunks(REPLY, size))) == "The gap widens every year.\n\n"
+
+
+def test_strip_forecast_json_keeps_backticks_that_are_not_a_fence():
+    assert "".join(strip_forecast_json(["Use `", "create_excel`", "` here"])) == "Use `create_excel`` here"
+    assert "".join(strip_forecast_json(["No JSON`"])) == "No JSON`"
+
+
+def test_strip_forecast_json_drains_the_stream():
+    seen = []
+
+    def chunks():
+        for chunk in _chunks(REPLY, 4):
+            seen.append(chunk)
+            yield chunk
+
+    list(strip_forecast_json(chunks()))
+    assert "".join(seen) == REPLY
@@ -0,0 +1,34 @@
+import json
+
+from excel_helper import FORECAST_JSON
+from forecast_store import ForecastStore, main as import_forecasts
+from forecast_table import regions_table, regions_table_from_json
+
+DOCUMENTS = [
+    {"region": "Durham", "forecast": FORECAST_JSON["forecast"][:3]},
+    {"region": "Bath", "forecast": FORECAST_JSON["forecast"][1:2], "notes": "ignored"},
+    {"region": "Leeds", "forecast": [{k: v for k, v in FORECAST_JSON["forecast"][0].items() if k != "net_migration"}]},
+]
+
+
+def test_regions_table_repeats_region_per_record():
+    table = regions_table(DOCUMENTS)
+    assert table.column_names[0] == "region"
+    assert table["region"].to_pylist() == ["Durham"] * 3 + ["Bath", "Leeds"]
+    assert table["net_migration"].to_pylist()[-1] is None
+    assert "population_makeup.tenure.owner_occupied" in table.column_names
+
+
+def test_regions_table_from_json_matches_regions_table(tmp_path):
+    path = tmp_path / "forecasts.jsonl"
+    path.write_text("\n".join(json.dumps(document) for document in DOCUMENTS) + "\n")
+    assert regions_table_from_json(str(path)).equals(regions_table(DOCUMENTS))
+
+
+def test_import_jsonl_into_store(tmp_path, capsys):
+    path = tmp_path / "forecasts.jsonl"
+    path.write_text("\n".join(json.dumps(document) for document in DOCUMENTS))
+    import_forecasts([str(path), "--store", str(tmp_path / "store")])
+    store = ForecastStore(str(tmp_path / "store"))
+    assert store.regions() == ["Bath", "Durham", "Leeds"]
+    assert store.load("Durham").num_rows == 3
@@ -0,0 +1,37 @@
+import json
+
+from bedrock_integration import _agent_usage, _request_body
+from fakes import PROMPT_CACHE_MIN_TOKENS, FakeBedrockRuntime
+
+
+def test_request_body_sends_the_system_prompt_as_a_cache_checkpoint():
+    body = _request_body("What is the gap?", 500, 1, system="You advise a council.")
+
+    assert body["system"] == [{"type": "text", "text": "You advise a council.", "cache_control": {"type": "ephemeral"}}]
+    assert body["messages"] == [{"role": "user", "content": [{"type": "text", "text": "What is the gap?"}]}]
+    assert "system" not in _request_body("What is the gap?", 500, 1)
+
+
+def test_agent_usage_maps_and_sums_trace_token_counts():
+    usage = {}
+    for tokens in (100, 50):
+        _agent_usage({"modelInvocationOutput": {"metadata": {"usage": {
+            "inputTokens": tokens, "outputTokens": 10, "cacheReadInputTokens": 1024, "cacheWriteInputTokens": 0,
+        }}}}, usage)
+    _agent_usage({"rationale": {"text": "no model call"}}, usage)
+
+    assert usage == {"input_tokens": 150, "output_tokens": 20, "cache_read_input_tokens": 2048,
+                     "cache_creation_input_tokens": 0}
+
+
+def test_fake_only_caches_system_prompts_above_the_minimum():
+    client = FakeBedrockRuntime()
+    short = json.dumps(_request_body("q", 500, 1, system="x" * 4 * (PROMPT_CACHE_MIN_TOKENS - 1)))
+    long = json.dumps(_request_body("q", 500, 1, system="x" * 4 * PROMPT_CACHE_MIN_TOKENS))
+
+    for _ in range(2):
+        usage = client._usage(short)
+        assert usage["input_tokens"] == PROMPT_CACHE_MIN_TOKENS - 1
+        assert "cache_read_input_tokens" not in usage and "cache_creation_input_tokens" not in usage
+    assert client._usage(long)["cache_creation_input_tokens"] == PROMPT_CACHE_MIN_TOKENS
+    assert client._usage(long)["cache_read_input_tokens"] == PROMPT_CACHE_MIN_TOKENS
@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "responses.sqlite3"))
+
+
+def test_key_ignores_whitespace_and_case_but_not_parameters():
+    assert ResponseCache.key("What is  the GAP?", "model", t=1) == ResponseCache.key(" what is the gap? ", "model", t=1)
+    assert ResponseCache.key("gap", "model", t=1) != ResponseCache.key("gap", "model", t=0.5)
+    assert ResponseCache.key("gap", "model") != ResponseCache.key("gap", "agent")
+
+
+def test_memory_then_disk_hits_survive_a_restart(cache, tmp_path):
+    cache.set("k", "answer", "model")
+    assert cache.get("k") == "answer"
+    assert cache.get("missing") is None
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+
+    reopened = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    assert reopened.get("k") == "answer"
+    assert reopened.get("k") == "answer"
+    assert reopened.stats == {"memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl=0.05)
+    cache.set("k", "answer", "model")
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+
+def test_least_recently_used_disk_entries_are_evicted(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(path, max_memory_entries=1, max_disk_entries=2)
+    cache.set("a", "1", "model")
+    time.sleep(0.01)
+    cache.set("b", "2", "model")
+    time.sleep(0.01)
+    assert cache.get("a") == "1"  # from disk, so "a" is now the most recently used
+    time.sleep(0.01)
+    cache.set("c", "3", "model")
+
+    reopened = ResponseCache(path)
+    assert reopened.get("a") == "1"
+    assert reopened.get("b") is None
+    assert reopened.get("c") == "3"
+
+
+def test_invalidate_drops_one_scope_or_everything(cache):
+    cache.set("agent-answer", "1", "agent")
+    cache.set("kb-passages", "2", "kb")
+    cache.invalidate("agent")
+    assert cache.get("agent-answer") is None
+    assert cache.get("kb-passages") == "2"
+    cache.invalidate()
+    assert cache.get("kb-passages") is None
+
+
+def test_in_memory_cache_writes_no_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = ResponseCache(":memory:")
+    cache.set("k", "answer", "model")
+    assert cache.get("k") == "answer"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_memory_hits_keep_disk_entries_from_eviction(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(path, max_disk_entries=2)
+    cache.set("hot", "1", "model")
+    time.sleep(0.01)
+    cache.set("cold", "2", "model")
+    time.sleep(0.01)
+    assert cache.get("hot") == "1"  # a memory hit
+    time.sleep(0.01)
+    cache.set("new", "3", "model")
+
+    reopened = ResponseCache(path)
+    assert reopened.get("hot") == "1"
+    assert reopened.get("cold") is None
+
+
+def test_unpersisted_entries_stay_in_memory(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(path, max_disk_entries=1)
+    cache.set("model-answer", "1", "model")
+    cache.set("session-answer", "2", "agent", persist=False)
+    assert cache.get("session-answer") == "2"
+
+    reopened = ResponseCache(path)
+    assert reopened.get("session-answer") is None
+    assert reopened.get("model-answer") == "1"
+    cache.invalidate("agent")
+    assert cache.get("session-answer") is None
@@ -0,0 +1,158 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes import FakeSageMakerServer
+from sagemaker import CSV, JSON, NPY, SageMakerClient, decode_response, encode_payload
+
+MATRIX = np.arange(12, dtype=np.float64).reshape(4, 3) / 4
+
+
+class _Response:
+    def __init__(self, content, content_type):
+        self.content = content
+        self.headers = {"Content-Type": content_type}
+
+    def json(self):
+        return json.loads(self.content)
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+
+def _npy(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def test_encode_npy_round_trips_arrays_and_frames():
+    np.testing.assert_array_equal(np.load(io.BytesIO(encode_payload(MATRIX, NPY))), MATRIX)
+    np.testing.assert_array_equal(np.load(io.BytesIO(encode_payload(pd.DataFrame(MATRIX), NPY))), MATRIX)
+
+
+def test_encode_csv_has_no_header_or_index():
+    assert encode_payload(MATRIX[:2], CSV).splitlines() == ["0.0,0.25,0.5", "0.75,1.0,1.25"]
+
+
+def test_encode_json_and_fallbacks():
+    assert json.loads(encode_payload(MATRIX, JSON)) == MATRIX.tolist()
+    assert json.loads(encode_payload({"instances": [[1, 2]]})) == {"instances": [[1, 2]]}
+    assert encode_payload(b"raw", CSV) == b"raw"
+    assert encode_payload(42) == "42"
+
+
+def test_decode_npy_and_csv_give_the_same_shape():
+    predictions = MATRIX.sum(axis=1)
+    from_npy = decode_response(_Response(_npy(predictions), NPY))
+    from_csv = decode_response(_Response("\n".join(str(float(p)) for p in predictions).encode(), CSV + "; charset=utf-8"))
+    assert from_npy.shape == from_csv.shape == (4,)
+    np.testing.assert_array_equal(from_csv, predictions)
+
+
+def test_decode_multi_column_csv_stays_2d():
+    np.testing.assert_array_equal(decode_response(_Response(encode_payload(MATRIX, CSV).encode(), CSV)), MATRIX)
+
+
+@pytest.mark.parametrize("content, content_type, expected", [
+    (b'{"predictions": [1, 2]}', JSON, {"predictions": [1, 2]}),
+    (b"not json", "text/plain", "not json"),
+])
+def test_decode_json_and_text(content, content_type, expected):
+    assert decode_response(_Response(content, content_type)) == expected
+
+
+class ScriptedServer:
+    """
+    Answers each POST with the next status in statuses, then 200 {"predictions": [1.0]}
+    """
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.requests = 0
+
+    def __enter__(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server.requests += 1
+                status = server.statuses.pop(0) if server.statuses else 200
+                payload = b'{"predictions": [1.0]}' if status == 200 else b'{"message": "busy"}'
+                self.send_response(status)
+                self.send_header("Content-Type", JSON)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        host, port = self._server.server_address[:2]
+        self.url = f"http://{host}:{port}/invocations"
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _client(**kwargs):
+    return SageMakerClient(backoff_factor=0, backoff_jitter=0, **kwargs)
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_client_retries_throttling_and_server_errors(status):
+    with ScriptedServer([status, status]) as server, _client(max_retries=3) as client:
+        assert client.invoke(server.url, {"instances": [[1.0]]}) == {"predictions": [1.0]}
+    assert server.requests == 3
+
+
+def test_client_gives_up_after_max_retries():
+    with ScriptedServer([503] * 5) as server, _client(max_retries=2) as client:
+        assert client.invoke(server.url, {"instances": [[1.0]]}) is None
+    assert server.requests == 3
+
+
+def test_client_does_not_retry_client_errors():
+    with ScriptedServer([400]) as server, _client() as client:
+        assert client.invoke(server.url, {"instances": [[1.0]]}) is None
+    assert server.requests == 1
+
+
+@pytest.mark.parametrize("content_type, accept", [(NPY, NPY), (JSON, NPY), (CSV, JSON)])
+def test_client_falls_back_to_json_when_formats_are_rejected(content_type, accept):
+    with FakeSageMakerServer() as server, _client() as client:
+        client.set_formats(server.url, content_type, accept)
+        assert client.invoke(server.url, MATRIX) == {"predictions": MATRIX.sum(axis=1).tolist()}
+        assert client.formats(server.url) == (JSON, JSON)
+        assert server.requests == 2
+        # The fallback is remembered, so later calls go straight to JSON
+        client.invoke(server.url, MATRIX)
+        assert server.requests == 3
+
+
+def test_client_keeps_explicit_formats():
+    with FakeSageMakerServer() as server, _client() as client:
+        client.set_formats(server.url, NPY, NPY)
+        assert client.invoke(server.url, MATRIX, content_type=CSV, accept=JSON) is None
+        assert client.formats(server.url) == (NPY, NPY)
+        assert server.requests == 1
+
+
+def test_client_uses_npy_when_the_endpoint_supports_it():
+    with FakeSageMakerServer(formats=(JSON, NPY)) as server, _client() as client:
+        client.set_formats(server.url, NPY, NPY)
+        np.testing.assert_array_equal(client.invoke(server.url, MATRIX), MATRIX.sum(axis=1))
+        assert server.requests == 1
@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fakes import FakeSageMakerServer
+from sagemaker import SageMakerClient
+from sagemaker_batcher import MicroBatcher
+
+
+def test_predictions_go_back_to_their_callers():
+    instances = [[i, i * 10] for i in range(50)]
+    with FakeSageMakerServer() as server, SageMakerClient() as client:
+        with MicroBatcher(server.url, max_batch_size=8, max_wait=0.02, client=client) as batcher:
+            with ThreadPoolExecutor(max_workers=16) as pool:
+                predictions = list(pool.map(batcher.predict, instances))
+        metrics = batcher.metrics
+
+    assert predictions == [i * 11 for i in range(50)]
+    assert metrics["requests"] == 50
+    assert metrics["batches"] < 50
+    assert max(metrics["batch_size_histogram"]) <= 8
+
+
+class _WrongCountClient:
+    def invoke(self, endpoint_url, payload, **kwargs):
+        return {"predictions": []}
+
+
+def test_bad_endpoint_response_fails_every_future_in_the_batch():
+    with MicroBatcher("http://fake", max_wait=0.05, client=_WrongCountClient()) as batcher:
+        futures = [batcher.submit([1]), batcher.submit([2])]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="Expected [12] predictions"):
+            future.result(timeout=1)
+
+
+def test_close_flushes_queued_requests_and_rejects_new_ones():
+    with FakeSageMakerServer() as server, SageMakerClient() as client:
+        batcher = MicroBatcher(server.url, max_wait=10, client=client)
+        future = batcher.submit([1, 2])
+        batcher.close()
+        assert future.result(timeout=1) == 3
+        with pytest.raises(RuntimeError, match="closed"):
+            batcher.submit([3])
+        batcher.close()
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from excel_helper import FORECAST_JSON
+from scenarios import ScenarioParams, _inputs, params_from_question, run_scenarios, simulate
+
+INPUTS = _inputs(FORECAST_JSON["forecast"])
+FIXED_SUPPLY = dict(n_sims=8, supply_volatility=0.0)
+
+
+def test_development_is_delivered_once_spread_over_the_forecast():
+    base = simulate(INPUTS, ScenarioParams(**FIXED_SUPPLY))
+    built = simulate(INPUTS, ScenarioParams(development_units=500, development_bungalow_share=0.4, **FIXED_SUPPLY))
+    extra = built["Supply"] - base["Supply"]
+    np.testing.assert_allclose(extra.sum(axis=0), 500, rtol=1e-4)
+    np.testing.assert_allclose(extra, 500 / len(INPUTS["year"]), rtol=1e-4)
+    np.testing.assert_allclose((built["Bungalow Supply"] - base["Bungalow Supply"]).sum(axis=0), 200, rtol=1e-4)
+
+
+def test_development_years_front_loads_delivery():
+    base = simulate(INPUTS, ScenarioParams(**FIXED_SUPPLY))
+    built = simulate(INPUTS, ScenarioParams(development_units=500, development_years=2, **FIXED_SUPPLY))
+    extra = (built["Supply"] - base["Supply"])[:, 0]
+    np.testing.assert_allclose(extra[:2], 250, rtol=1e-4)
+    assert not extra[2:].any()
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("What if all new homes were bungalows?", ScenarioParams(bungalow_share=1.0)),
+    ("What if we built 500 homes, 40% bungalows?",
+     ScenarioParams(development_units=500, development_bungalow_share=0.4)),
+    ("If we built 1,200 homes over 4 years, what is the gap?",
+     ScenarioParams(development_units=1200, development_years=4)),
+    ("Simulate the bungalow gap", ScenarioParams()),
+])
+def test_params_from_question(question, expected):
+    assert params_from_question(question) == expected
+
+
+@pytest.mark.parametrize("question", [
+    "If the council approves, what's the gap?",
+    "What is the bungalow shortfall in 2027?",
+    "Is it different if the region grows?",
+    "What if this development was all bungalows?",
+])
+def test_params_from_question_ignores_plain_questions(question):
+    assert params_from_question(question) is None
+
+
+def test_development_without_size_is_not_a_scenario():
+    # Its size is unknown, so it would only reproduce the baseline under a scenario title
+    assert params_from_question("What if this development was all bungalows?") is None
+    assert params_from_question("What if the scheme were 40% bungalows?") is None
+    assert params_from_question("Simulate this development as all bungalows") == ScenarioParams()
+
+
+def test_bungalow_demand_follows_the_simulated_older_population():
+    fixed_demand = dict(n_sims=8, demand_volatility=0.0, migration_volatility=0.0)
+    paths = simulate(INPUTS, ScenarioParams(**fixed_demand))
+    older = paths["Population 65+"]
+    assert older.std(axis=1)[-1] > 0
+    np.testing.assert_allclose(paths["Bungalow Demand"] / INPUTS["bungalow_demand"][:, None],
+                               older / INPUTS["older_population"][:, None], rtol=1e-4)
+
+    no_ages = dict(INPUTS, older_population=np.zeros_like(INPUTS["older_population"]))
+    paths = simulate(no_ages, ScenarioParams(**fixed_demand))
+    np.testing.assert_allclose(paths["Bungalow Demand"], np.broadcast_to(INPUTS["bungalow_demand"][:, None], (5, 8)),
+                               rtol=1e-4)
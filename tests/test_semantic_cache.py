@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from semantic_cache import HashingEmbedder, SemanticCache, question_guard
+
+
+def test_hashing_embedder_is_deterministic_unit_vector():
+    first = HashingEmbedder()("What is the bungalow shortfall in 2027?")
+    second = HashingEmbedder()("What is the bungalow shortfall in 2027?")
+    assert first.shape == (1024,)
+    np.testing.assert_array_equal(first, second)
+    assert np.linalg.norm(first) == pytest.approx(1.0)
+
+
+def test_hashing_embedder_folds_synonyms_and_plurals():
+    embed = HashingEmbedder()
+    assert embed("bungalow shortfall in 2027") @ embed("how many bungalows short in 2027") == pytest.approx(1.0)
+
+
+def test_hashing_embedder_empty_text_is_zero():
+    assert not HashingEmbedder()("").any()
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("What is the bungalow shortfall in 2027?", {"2027"}),
+    ("What is the bungalow shortfall in 2027 in Durham?", {"2027", "durham"}),
+    ("How many over 65s in Durham?", {"65", "durham", "w:over"}),
+    ("Isn't there a shortfall? In Bath, say", {"w:not", "bath"}),
+    ("Supply of 1,200 homes", {"1200"}),
+])
+def test_question_guard(question, expected):
+    assert question_guard(question) == expected
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What is the bungalow shortfall in 2027?", "What is the bungalow shortfall in 2027 in Durham?"),
+    ("How many over 65s need bungalows?", "How many under 65s need bungalows?"),
+    ("Is there a bungalow shortfall?", "Is there no bungalow shortfall?"),
+    ("What is the bungalow shortfall in 2027?", "What is the bungalow shortfall in 2028?"),
+])
+def test_lookup_rejects_questions_that_differ_in_guard_terms(cached, asked):
+    cache = SemanticCache(HashingEmbedder())
+    cache.add(cached, "answer")
+    assert cache.lookup(asked) is None
+
+
+def test_lookup_finds_reworded_question_in_scope():
+    cache = SemanticCache(HashingEmbedder())
+    cache.add("What is the bungalow shortfall in 2027?", "answer", scope="kb")
+    assert cache.lookup("how many bungalows short in 2027", scope="kb") == "answer"
+    assert cache.lookup("how many bungalows short in 2027", scope="agent") is None
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_entries_expire_and_invalidate():
+    now = [0.0]
+    cache = SemanticCache(HashingEmbedder(), max_age=10, clock=lambda: now[0])
+    cache.add("bungalow shortfall in 2027", "a", scope="kb")
+    cache.add("housing stock in 2029", "b", scope="model")
+    now[0] = 11
+    assert cache.lookup("bungalow shortfall in 2027", scope="kb") is None
+    now[0] = 0
+    cache.invalidate("kb")
+    assert cache.lookup("bungalow shortfall in 2027", scope="kb") is None
+    assert cache.lookup("housing stock in 2029", scope="model") == "b"
+    assert len(cache) == 1
+
+
+def test_full_cache_replaces_oldest_entry():
+    now = [0.0]
+    cache = SemanticCache(HashingEmbedder(), capacity=2, clock=lambda: now[0])
+    for i, question in enumerate(["shortfall in 2027", "shortfall in 2028", "shortfall in 2029"]):
+        now[0] = i
+        cache.add(question, question)
+    assert len(cache) == 2
+    assert cache.lookup("shortfall in 2027") is None
+    assert cache.lookup("shortfall in 2029") == "shortfall in 2029"
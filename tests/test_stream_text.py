@@ -0,0 +1,107 @@
+import json
+import logging
+
+import pytest
+
+import bedrock_integration
+import tracing
+from bedrock_integration import stream_metrics, stream_text
+
+
+def _event(payload):
+    return {'chunk': {'bytes': json.dumps(payload).encode('utf-8')}}
+
+
+class ScriptedRuntime:
+    """
+    Streams a fixed list of response stream events
+    """
+
+    def __init__(self, events):
+        self.events = events
+        self.calls = 0
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        self.calls += 1
+        return {'body': iter(self.events)}
+
+
+EVENTS = [
+    _event({'type': 'message_start', 'message': {'usage': {'input_tokens': 40, 'output_tokens': 1,
+                                                           'cache_read_input_tokens': 1100}}}),
+    _event({'type': 'content_block_start', 'index': 0, 'content_block': {'type': 'text', 'text': ''}}),
+    _event({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'Demand '}}),
+    {'internalServerException': {}},
+    _event({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': ''}}),
+    _event({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'outpaces supply.'}}),
+    _event({'type': 'content_block_stop', 'index': 0}),
+    _event({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'}, 'usage': {'output_tokens': 6}}),
+    _event({'type': 'message_stop'}),
+]
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.spans = {}
+
+    def emit(self, record):
+        line = json.loads(record.getMessage())
+        self.spans[line['span']] = line
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    bedrock_integration.response_cache.invalidate()
+    yield
+    bedrock_integration.response_cache.invalidate()
+
+
+@pytest.fixture
+def spans():
+    handler = Collect()
+    tracing.logger.addHandler(handler)
+    tracing.reset()
+    tracing.enable()
+    yield handler.spans
+    tracing.enable(False)
+    tracing.reset()
+    tracing.logger.removeHandler(handler)
+    tracing.logger.setLevel(logging.NOTSET)
+
+
+def test_stream_text_yields_text_deltas_only():
+    client = ScriptedRuntime(EVENTS)
+    assert list(stream_text('What is the gap?', use_cache=False, client=client)) == ['Demand ', 'outpaces supply.']
+    assert stream_metrics['model'] >= 0
+
+
+def test_stream_text_records_usage_from_start_and_delta_events(spans):
+    ''.join(stream_text('What is the gap?', use_cache=False, client=ScriptedRuntime(EVENTS)))
+
+    span = spans['bedrock.model_stream']
+    assert span['input_tokens'] == 40
+    assert span['output_tokens'] == 6
+    assert span['cache_read_input_tokens'] == 1100
+    assert span['cache_hit'] is False
+    histograms = tracing.metrics()['histograms']
+    assert histograms['bedrock.model_first_chunk.warm']['count'] == 1
+
+
+def test_stream_text_caches_the_completed_answer():
+    client = ScriptedRuntime(EVENTS)
+    assert ''.join(stream_text('What is the gap?', client=client)) == 'Demand outpaces supply.'
+    assert list(stream_text('What is the gap?', client=client)) == ['Demand outpaces supply.']
+    assert client.calls == 1
+    # A different system prompt is a different request
+    ''.join(stream_text('What is the gap?', client=client, system='Answer briefly.'))
+    assert client.calls == 2
+
+
+def test_abandoned_stream_is_not_cached():
+    client = ScriptedRuntime(EVENTS)
+    stream = stream_text('What is the gap?', client=client)
+    assert next(stream) == 'Demand '
+    stream.close()
+    ''.join(stream_text('What is the gap?', client=client))
+    assert client.calls == 2
@@ -0,0 +1,64 @@
+import json
+import logging
+
+import pytest
+
+import tracing
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        if record.name == tracing.logger.name:
+            self.lines.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def root_handler():
+    # As after logging.basicConfig(): the root logger has a handler and the default WARNING level
+    root = logging.getLogger()
+    handler, level = Collect(), root.level
+    root.addHandler(handler)
+    root.setLevel(logging.WARNING)
+    tracing.reset()
+    yield handler
+    tracing.enable(False)
+    tracing.reset()
+    tracing.logger.setLevel(logging.NOTSET)
+    root.removeHandler(handler)
+    root.setLevel(level)
+
+
+def test_span_emits_a_json_line_when_the_root_logger_is_at_warning(root_handler):
+    tracing.enable()
+
+    with tracing.span('create_excel', rows=5) as span:
+        span.set(cache_hit=False)
+
+    [line] = root_handler.lines
+    assert line['span'] == 'create_excel'
+    assert line['rows'] == 5 and line['cache_hit'] is False
+    assert line['duration'] >= 0
+    assert tracing.metrics()['histograms']['create_excel']['count'] == 1
+
+
+def test_failed_span_records_the_error(root_handler):
+    tracing.enable()
+
+    with pytest.raises(ValueError):
+        with tracing.span('export'):
+            raise ValueError('bad')
+
+    [line] = root_handler.lines
+    assert line['error'] == 'ValueError'
+
+
+def test_disabled_spans_log_nothing(root_handler):
+    tracing.enable()
+    tracing.enable(False)
+    with tracing.span('create_excel'):
+        pass
+    assert root_handler.lines == []